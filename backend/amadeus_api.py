@@ -4,23 +4,240 @@ Amadeus API integration module.
 This module handles all interactions with the Amadeus for Developers API,
 including flight search, hotel search, location search, and activity search.
 """
+import functools
 import logging
+import operator
+import random
+import threading
+import time
+from collections import namedtuple
+from urllib.error import URLError
 from amadeus import Client, ResponseError
+from cachetools import TTLCache
 from dotenv import load_dotenv
 import os
+import requests
+from requests.adapters import HTTPAdapter
 
-# Load environment variables
-load_dotenv()
+from caching import PartitionedTTLCache, ttl_cached
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+
+# Load environment variables from .env, unless the deployment already
+# provides the credentials (saves reading the file in every worker)
+if not (os.getenv("AMADEUS_CLIENT_ID") and os.getenv("AMADEUS_CLIENT_SECRET")):
+    load_dotenv()
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Shared HTTP session for all Amadeus calls. The SDK defaults to urllib's
+# urlopen, which opens a new TCP+TLS connection for every request; the
+# session's connection pool keeps them alive between calls instead. The
+# pool is sized for every Gunicorn thread plus the app's fan-out pool
+# calling at once; connections beyond that are opened rather than waited for.
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(pool_connections=4, pool_maxsize=200, pool_block=False)
+_SESSION.mount('https://', _ADAPTER)
+_SESSION.mount('http://', _ADAPTER)
+_HTTP_TIMEOUT = 30  # seconds
+
+# Response caches. Flight offers go stale quickly, hotel offers a little
+# less so, and location/airport reference data is effectively static.
+# Flight offers are grouped per (origin, destination) route, keeping the
+# last few (date, adults) searches for each.
+_FLIGHT_CACHE = PartitionedTTLCache(maxsize=1024, ttl=10 * 60, partition_size=8)
+_HOTEL_CACHE = TTLCache(maxsize=512, ttl=15 * 60)
+_ACTIVITY_CACHE = TTLCache(maxsize=512, ttl=15 * 60)
+_AIRPORT_CACHE = TTLCache(maxsize=1024, ttl=24 * 3600)
+_LOCATION_CACHE = TTLCache(maxsize=1024, ttl=24 * 3600)
+_GEOCODE_CACHE = TTLCache(maxsize=10_000, ttl=7 * 24 * 3600)
+
+# Retry policy for rate-limited (HTTP 429) responses: 0.5s, 1s, 2s, ...
+_MAX_ATTEMPTS = 5
+_BACKOFF_BASE = 0.5
+_BACKOFF_MAX = 8.0
+
+# Coordinates of a resolved location
+GeoCode = namedtuple('GeoCode', ['latitude', 'longitude'])
+
+def _flight_key(origin, destination, departure_date, adults=1):
+    return (origin.upper(), destination.upper(), departure_date, int(adults))
+
+def _city_key(city_code):
+    return city_code.upper()
+
+def _coordinates_key(latitude, longitude):
+    return (round(float(latitude), 3), round(float(longitude), 3))
+
+def _keyword_key(keyword):
+    return keyword.strip().lower()
+
+class _SessionResponse:
+    """Adapts a requests.Response to the urllib response interface the SDK parses."""
+
+    def __init__(self, response):
+        self.status = response.status_code
+        self._response = response
+
+    def info(self):
+        return self._response.headers
+
+    def read(self):
+        return self._response.content
+
+def _session_http(http_request):
+    """
+    Sends a request built by the Amadeus SDK through the shared session.
+    
+    Passed to the SDK client as its ``http`` handler in place of urlopen.
+    Network errors are raised as URLError so the SDK reports them as a
+    NetworkError, exactly as it does with its default handler.
+    
+    Args:
+        http_request (urllib.request.Request): Request prepared by the SDK
+    
+    Returns:
+        _SessionResponse: Response object readable by the SDK
+    """
+    try:
+        response = _SESSION.request(
+            http_request.get_method(),
+            http_request.full_url,
+            data=http_request.data,
+            headers=dict(http_request.header_items()),
+            timeout=_HTTP_TIMEOUT
+        )
+    except requests.exceptions.RequestException as error:
+        raise URLError(error) from error
+    return _SessionResponse(response)
+
+def _status_code(error):
+    """Returns the HTTP status code of an Amadeus ResponseError, if any."""
+    return getattr(getattr(error, 'response', None), 'status_code', None)
+
+def _retry_after(error):
+    """Returns the Retry-After delay (in seconds) sent with an error, if any."""
+    headers = getattr(error.response, 'headers', None) or {}
+    try:
+        return float(headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+def _request_with_retry(request, **params):
+    """
+    Calls an Amadeus SDK endpoint, retrying rate-limited responses.
+    
+    The Amadeus Test environment rejects bursts with HTTP 429. Those calls
+    are retried with jittered exponential backoff, waiting at least as
+    long as the Retry-After header asks for. Any other error, a 429 on
+    the final attempt, or a Retry-After longer than the maximum backoff
+    is raised to the caller rather than holding the request thread.
+    
+    Args:
+        request (callable): SDK method to call (e.g., ``amadeus.shopping.hotel_offers.get``)
+        **params: Query parameters passed to the SDK method
+    
+    Returns:
+        Response: The Amadeus API response
+    
+    Raises:
+        ResponseError: If the call fails for a reason other than rate limiting,
+            is still rate limited after the final attempt, or asks for a
+            longer wait than the maximum backoff
+    """
+    for attempt in range(1, _MAX_ATTEMPTS + 1):
+        try:
+            return request(**params)
+        except ResponseError as error:
+            if _status_code(error) != 429 or attempt == _MAX_ATTEMPTS:
+                raise
+            retry_after = _retry_after(error) or 0
+            if retry_after > _BACKOFF_MAX:
+                logger.warning("Amadeus asked to retry in %.0fs, giving up", retry_after)
+                raise
+            delay = min(_BACKOFF_MAX, _BACKOFF_BASE * 2 ** (attempt - 1))
+            delay = delay / 2 + random.uniform(0, delay / 2)
+            delay = max(delay, retry_after)
+            logger.warning("Amadeus rate limit hit, retrying in %.2fs (attempt %d/%d)", delay, attempt, _MAX_ATTEMPTS)
+            time.sleep(delay)
+
+def _is_upstream_failure(error):
+    """Whether an error means Amadeus itself is failing rather than rejecting the request."""
+    if not isinstance(error, ResponseError):
+        return False
+    status_code = _status_code(error)
+    if status_code is None:
+        return True  # Network error
+    return isinstance(status_code, int) and (status_code == 429 or status_code >= 500)
+
+# Fails fast while Amadeus is down or rate limiting hard: after 5 failed
+# calls in a row, calls are rejected for 30 seconds before a probe.
+_BREAKER = CircuitBreaker('Amadeus API', fail_max=5, reset_timeout=30,
+                          is_failure=_is_upstream_failure)
+
+# Serialises replacing the shared client after a rejected token
+_REAUTH_LOCK = threading.Lock()
+
+def _replace_client(rejected_client):
+    """
+    Replaces the shared client after its access token was rejected.
+    
+    When several requests get a 401 at once, only the first one builds a
+    new client; the others find it already replaced and reuse the new one
+    instead of each fetching another token.
+    """
+    with _REAUTH_LOCK:
+        if get_amadeus_client() is rejected_client:
+            logger.warning("Amadeus access token rejected, retrying with a new client")
+            get_amadeus_client.cache_clear()
+            get_amadeus_client()
+
+def _request_with_reauth(endpoint, **params):
+    """
+    Calls an Amadeus SDK endpoint on the shared client, re-authenticating once.
+    
+    The SDK refreshes its access token when it expires, but a token can
+    still be rejected early (e.g. revoked, or credentials rotated). On
+    HTTP 401 the shared client is replaced and the call is retried once
+    with a freshly authenticated one.
+    """
+    for attempt in (1, 2):
+        client = get_amadeus_client()
+        request = operator.attrgetter(endpoint)(client)
+        try:
+            return _request_with_retry(request, **params)
+        except ResponseError as error:
+            if _status_code(error) != 401 or attempt == 2:
+                raise
+            _replace_client(client)
+
+def _call_amadeus(endpoint, **params):
+    """
+    Calls an Amadeus SDK endpoint through the circuit breaker, with retries.
+    
+    Args:
+        endpoint (str): Dotted path of the SDK method on the client
+            (e.g., ``'shopping.hotel_offers.get'``)
+        **params: Query parameters passed to the SDK method
+    
+    Raises:
+        CircuitOpenError: If Amadeus has been failing and the breaker is open
+        ResponseError: If the call itself fails
+        ValueError: If Amadeus credentials are not configured
+    """
+    return _BREAKER.call(_request_with_reauth, endpoint, **params)
+
+@functools.lru_cache(maxsize=1)
 def get_amadeus_client():
     """
-    Initializes and returns an Amadeus API client.
+    Initializes and returns the shared Amadeus API client.
     
-    Reads credentials from environment variables. Raises ValueError if
-    credentials are missing.
+    Reads credentials from environment variables on first use only; the
+    client (and the OAuth access token it holds) is reused by every
+    subsequent call, and requests are sent through the shared connection
+    pool. Raises ValueError if credentials are missing, in which case
+    nothing is cached and the next call tries again. Call
+    ``get_amadeus_client.cache_clear()`` to force a fresh client.
     
     Returns:
         Client: Configured Amadeus API client
@@ -38,14 +255,16 @@ def get_amadeus_client():
     try:
         client = Client(
             client_id=client_id,
-            client_secret=client_secret
+            client_secret=client_secret,
+            http=_session_http
         )
         logger.debug("Amadeus API client initialized successfully")
         return client
     except Exception as e:
-        logger.error(f"Failed to initialize Amadeus client: {str(e)}")
+        logger.error("Failed to initialize Amadeus client: %s", e)
         raise
 
+@ttl_cached(_FLIGHT_CACHE, key=_flight_key, coalesce=True)
 def search_flights(origin, destination, departure_date, adults=1):
     """
     Searches for flights using the Amadeus API.
@@ -62,14 +281,17 @@ def search_flights(origin, destination, departure_date, adults=1):
     Returns:
         list: List of flight offers with pricing and itinerary details, or None if error
     
+    Raises:
+        CircuitOpenError: If Amadeus is failing and calls are being rejected
+    
     Note:
         The Amadeus Test environment has rate limits. For production use,
         upgrade to a paid plan.
     """
     try:
-        logger.info(f"Searching flights: {origin} -> {destination} on {departure_date} for {adults} adult(s)")
-        amadeus = get_amadeus_client()
-        response = amadeus.shopping.flight_offers_search.get(
+        logger.info("Searching flights: %s -> %s on %s for %d adult(s)", origin, destination, departure_date, adults)
+        response = _call_amadeus(
+            'shopping.flight_offers_search.get',
             originLocationCode=origin.upper(),  # Ensure uppercase for IATA codes
             destinationLocationCode=destination.upper(),
             departureDate=departure_date,
@@ -77,30 +299,34 @@ def search_flights(origin, destination, departure_date, adults=1):
         )
         
         if response.data:
-            logger.info(f"Found {len(response.data)} flight options")
+            logger.info("Found %d flight options", len(response.data))
         else:
             logger.warning("No flight offers returned from API")
         
         return response.data
+    except CircuitOpenError:
+        # Let the caller answer 503 while Amadeus is unavailable
+        raise
     except ResponseError as error:
         # Handle Amadeus API-specific errors
-        logger.error(f"Amadeus API error in flight search: {error.description if hasattr(error, 'description') else str(error)}")
-        logger.debug(f"Error code: {error.code if hasattr(error, 'code') else 'N/A'}")
+        logger.error("Amadeus API error in flight search: %s", error)
+        logger.debug("Error code: %s", getattr(error, 'code', 'N/A'))
         
-        # Check for rate limiting
-        if hasattr(error, 'code') and error.code == 429:
+        # Check for rate limiting (still limited after all retries)
+        if _status_code(error) == 429:
             logger.warning("Rate limit exceeded for Amadeus API")
         
         return None
     except ValueError as error:
         # Handle missing credentials
-        logger.error(f"Configuration error: {str(error)}")
+        logger.error("Configuration error: %s", error)
         return None
     except Exception as error:
         # Handle unexpected errors
-        logger.error(f"Unexpected error in flight search: {str(error)}", exc_info=True)
+        logger.error("Unexpected error in flight search: %s", error, exc_info=True)
         return None
 
+@ttl_cached(_AIRPORT_CACHE, key=_coordinates_key, coalesce=True)
 def get_nearest_airports(latitude, longitude):
     """
     Finds the nearest airports to a given latitude and longitude.
@@ -115,31 +341,38 @@ def get_nearest_airports(latitude, longitude):
     
     Returns:
         list: List of nearby airports with distances, or None if error
+    
+    Raises:
+        CircuitOpenError: If Amadeus is failing and calls are being rejected
     """
     try:
-        logger.info(f"Finding airports near coordinates: {latitude}, {longitude}")
-        amadeus = get_amadeus_client()
-        response = amadeus.reference_data.locations.airports.get(
+        logger.info("Finding airports near coordinates: %s, %s", latitude, longitude)
+        response = _call_amadeus(
+            'reference_data.locations.airports.get',
             latitude=latitude,
             longitude=longitude
         )
         
         if response.data:
-            logger.info(f"Found {len(response.data)} nearby airports")
+            logger.info("Found %d nearby airports", len(response.data))
         else:
             logger.warning("No airports found near specified coordinates")
         
         return response.data
+    except CircuitOpenError:
+        # Let the caller answer 503 while Amadeus is unavailable
+        raise
     except ResponseError as error:
-        logger.error(f"Amadeus API error in nearest airports search: {error.description if hasattr(error, 'description') else str(error)}")
+        logger.error("Amadeus API error in nearest airports search: %s", error)
         return None
     except ValueError as error:
-        logger.error(f"Configuration error: {str(error)}")
+        logger.error("Configuration error: %s", error)
         return None
     except Exception as error:
-        logger.error(f"Unexpected error in nearest airports search: {str(error)}", exc_info=True)
+        logger.error("Unexpected error in nearest airports search: %s", error, exc_info=True)
         return None
 
+@ttl_cached(_HOTEL_CACHE, key=_city_key, coalesce=True)
 def search_hotels(city_code):
     """
     Searches for hotels in a given city using the Amadeus Hotel Offers API.
@@ -149,26 +382,34 @@ def search_hotels(city_code):
     
     Returns:
         list: List of hotel offers, or None if error
+    
+    Raises:
+        CircuitOpenError: If Amadeus is failing and calls are being rejected
     """
     try:
-        logger.info(f"Searching hotels in city: {city_code}")
-        amadeus = get_amadeus_client()
-        response = amadeus.shopping.hotel_offers.get(cityCode=city_code.upper())
+        logger.info("Searching hotels in city: %s", city_code)
+        response = _call_amadeus(
+            'shopping.hotel_offers.get',
+            cityCode=city_code.upper()
+        )
         
         if response.data:
-            logger.info(f"Found hotel offers for {city_code}")
+            logger.info("Found hotel offers for %s", city_code)
         else:
-            logger.warning(f"No hotels found for city code: {city_code}")
+            logger.warning("No hotels found for city code: %s", city_code)
         
         return response.data
+    except CircuitOpenError:
+        # Let the caller answer 503 while Amadeus is unavailable
+        raise
     except ResponseError as error:
-        logger.error(f"Amadeus API error in hotel search: {error.description if hasattr(error, 'description') else str(error)}")
+        logger.error("Amadeus API error in hotel search: %s", error)
         return None
     except ValueError as error:
-        logger.error(f"Configuration error: {str(error)}")
+        logger.error("Configuration error: %s", error)
         return None
     except Exception as error:
-        logger.error(f"Unexpected error in hotel search: {str(error)}", exc_info=True)
+        logger.error("Unexpected error in hotel search: %s", error, exc_info=True)
         return None
 
 def search_cars(city_code):
@@ -186,19 +427,20 @@ def search_cars(city_code):
         None: Car search is not yet available
     """
     try:
-        logger.info(f"Car search requested for city: {city_code}")
+        logger.info("Car search requested for city: %s", city_code)
         # Note: This is a placeholder for the actual car search API call,
         # as the Amadeus Python SDK might not have a direct method for it.
         # You might need to use the raw `amadeus.get` method with the correct endpoint.
         logger.warning("Car search not yet implemented in the SDK")
         return None
     except (ResponseError, ValueError) as error:
-        logger.error(f"Error in car search: {str(error)}")
+        logger.error("Error in car search: %s", error)
         return None
     except Exception as error:
-        logger.error(f"Unexpected error in car search: {str(error)}", exc_info=True)
+        logger.error("Unexpected error in car search: %s", error, exc_info=True)
         return None
 
+@ttl_cached(_ACTIVITY_CACHE, key=_coordinates_key, coalesce=True)
 def search_activities(latitude, longitude):
     """
     Searches for activities near a given location using the Amadeus Activities API.
@@ -209,31 +451,38 @@ def search_activities(latitude, longitude):
     
     Returns:
         list: List of activities near the location, or None if error
+    
+    Raises:
+        CircuitOpenError: If Amadeus is failing and calls are being rejected
     """
     try:
-        logger.info(f"Searching activities near coordinates: {latitude}, {longitude}")
-        amadeus = get_amadeus_client()
-        response = amadeus.shopping.activities.get(
+        logger.info("Searching activities near coordinates: %s, %s", latitude, longitude)
+        response = _call_amadeus(
+            'shopping.activities.get',
             latitude=latitude,
             longitude=longitude
         )
         
         if response.data:
-            logger.info(f"Found activities near location")
+            logger.info("Found activities near location")
         else:
             logger.warning("No activities found near specified coordinates")
         
         return response.data
+    except CircuitOpenError:
+        # Let the caller answer 503 while Amadeus is unavailable
+        raise
     except ResponseError as error:
-        logger.error(f"Amadeus API error in activity search: {error.description if hasattr(error, 'description') else str(error)}")
+        logger.error("Amadeus API error in activity search: %s", error)
         return None
     except ValueError as error:
-        logger.error(f"Configuration error: {str(error)}")
+        logger.error("Configuration error: %s", error)
         return None
     except Exception as error:
-        logger.error(f"Unexpected error in activity search: {str(error)}", exc_info=True)
+        logger.error("Unexpected error in activity search: %s", error, exc_info=True)
         return None
 
+@ttl_cached(_LOCATION_CACHE, key=_keyword_key, coalesce=True)
 def search_location(keyword):
     """
     Searches for a location (city or airport) and returns its coordinates.
@@ -246,30 +495,74 @@ def search_location(keyword):
     
     Returns:
         list: List of matching locations with geographic codes, or None if error
+    
+    Raises:
+        CircuitOpenError: If Amadeus is failing and calls are being rejected
     """
     try:
-        logger.info(f"Searching for location: {keyword}")
-        amadeus = get_amadeus_client()
-        response = amadeus.reference_data.locations.get(
+        logger.info("Searching for location: %s", keyword)
+        response = _call_amadeus(
+            'reference_data.locations.get',
             keyword=keyword,
             subType='CITY,AIRPORT'
         )
         
         if response.data:
-            logger.info(f"Found {len(response.data)} location(s) matching '{keyword}'")
+            logger.info("Found %d location(s) matching '%s'", len(response.data), keyword)
         else:
-            logger.warning(f"No locations found matching '{keyword}'")
+            logger.warning("No locations found matching '%s'", keyword)
         
         return response.data
+    except CircuitOpenError:
+        # Let the caller answer 503 while Amadeus is unavailable
+        raise
     except ResponseError as error:
-        logger.error(f"Amadeus API error in location search: {error.description if hasattr(error, 'description') else str(error)}")
+        logger.error("Amadeus API error in location search: %s", error)
         return None
     except ValueError as error:
-        logger.error(f"Configuration error: {str(error)}")
+        logger.error("Configuration error: %s", error)
         return None
     except Exception as error:
-        logger.error(f"Unexpected error in location search: {str(error)}", exc_info=True)
+        logger.error("Unexpected error in location search: %s", error, exc_info=True)
+        return None
+
+@ttl_cached(_GEOCODE_CACHE, key=_keyword_key)
+def resolve_geocode(keyword):
+    """
+    Resolves a location name to the coordinates of its best match.
+    
+    City coordinates practically never change, so resolved keywords are
+    kept for a week. Repeated lookups for popular destinations skip the
+    location search call entirely.
+    
+    Args:
+        keyword (str): Location name (city, airport, landmark, etc.)
+    
+    Returns:
+        GeoCode: (latitude, longitude) of the first matching location, or
+                 None if no location with coordinates was found
+    
+    Raises:
+        CircuitOpenError: If Amadeus is failing and calls are being rejected
+    """
+    locations = search_location(keyword)
+    if not locations:
         return None
+    geo_code = locations[0].get('geoCode') or {}
+    latitude, longitude = geo_code.get('latitude'), geo_code.get('longitude')
+    if latitude is None or longitude is None:
+        return None
+    return GeoCode(latitude, longitude)
+
+def clear_caches():
+    """
+    Empties every Amadeus response cache.
+    
+    Useful in tests and after changing API credentials.
+    """
+    for func in (search_flights, get_nearest_airports, search_hotels,
+                 search_activities, search_location, resolve_geocode):
+        func.cache_clear()
 
 if __name__ == '__main__':
     # Example usage:
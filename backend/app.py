@@ -6,10 +6,25 @@ This module provides REST API endpoints for:
 - Visa requirements checking
 - Nearest airport search
 - Hotel, car, and activity search
+- Combined trip search (flights, hotels and activities at once)
+- Combined destination lookup (nearest airports and activities at once)
+- Response cache statistics
 """
+import functools
+import hashlib
 import logging
+import os
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import orjson
 from flask import Flask, request, jsonify
-from amadeus_api import search_flights, get_nearest_airports, search_hotels, search_cars, search_activities, search_location
+from flask.json.provider import DefaultJSONProvider
+from amadeus_api import search_flights, get_nearest_airports, search_hotels, search_cars, search_activities, resolve_geocode
+from caching import cache_stats
+from circuit_breaker import CircuitOpenError
 from sherpa_api import get_visa_requirements
 
 # Configure logging
@@ -19,7 +34,176 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Expected format for date query parameters (YYYY-MM-DD)
+_DATE_RE = re.compile(r'[0-9]{4}-[0-9]{2}-[0-9]{2}')
+# IATA airport/city codes are exactly three letters
+_IATA_RE = re.compile(r'[A-Z]{3}')
+# ISO 3166-1 alpha-2 country codes accepted by the visa check
+_ISO_COUNTRY_CODES = frozenset("""
+    AD AE AF AG AI AL AM AO AQ AR AS AT AU AW AX AZ
+    BA BB BD BE BF BG BH BI BJ BL BM BN BO BQ BR BS BT BV BW BY BZ
+    CA CC CD CF CG CH CI CK CL CM CN CO CR CU CV CW CX CY CZ
+    DE DJ DK DM DO DZ EC EE EG EH ER ES ET FI FJ FK FM FO FR
+    GA GB GD GE GF GG GH GI GL GM GN GP GQ GR GS GT GU GW GY
+    HK HM HN HR HT HU ID IE IL IM IN IO IQ IR IS IT JE JM JO JP
+    KE KG KH KI KM KN KP KR KW KY KZ LA LB LC LI LK LR LS LT LU LV LY
+    MA MC MD ME MF MG MH MK ML MM MN MO MP MQ MR MS MT MU MV MW MX MY MZ
+    NA NC NE NF NG NI NL NO NP NR NU NZ OM PA PE PF PG PH PK PL PM PN PR PS PT PW PY
+    QA RE RO RS RU RW SA SB SC SD SE SG SH SI SJ SK SL SM SN SO SR SS ST SV SX SY SZ
+    TC TD TF TG TH TJ TK TL TM TN TO TR TT TV TW TZ UA UG UM US UY UZ
+    VA VC VE VG VI VN VU WF WS YE YT ZA ZM ZW
+""".split())
+
+def _is_valid_date(value):
+    """Checks that a date is in YYYY-MM-DD format and exists in the calendar."""
+    if not _DATE_RE.fullmatch(value):
+        return False
+    try:
+        datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        return False
+    return True
+
+def _validate_route(origin, destination, departure_date):
+    """
+    Validates the route parameters shared by the flight and trip searches.
+    
+    Args:
+        origin (str): IATA code of the origin airport
+        destination (str): IATA code of the destination airport or city
+        departure_date (str): Departure date, expected in YYYY-MM-DD format
+    
+    Returns:
+        tuple: (origin, destination, error) with the codes upper-cased and
+               interned, and error set to a 400 response to return when a
+               parameter is invalid (None otherwise)
+    """
+    origin = sys.intern(origin.upper())
+    destination = sys.intern(destination.upper())
+    if not (_IATA_RE.fullmatch(origin) and _IATA_RE.fullmatch(destination)):
+        logger.warning("Invalid airport code format: origin=%s, destination=%s", origin, destination)
+        return origin, destination, (jsonify({
+            'error': 'Invalid airport code format',
+            'message': 'Origin and destination must be 3-letter IATA codes (e.g., JFK, LHR)'
+        }), 400)
+
+    if not _is_valid_date(departure_date):
+        logger.warning("Invalid date format: %s", departure_date)
+        return origin, destination, (jsonify({
+            'error': 'Invalid date format. Use YYYY-MM-DD format'
+        }), 400)
+
+    return origin, destination, None
+
+def require_params(*names, max_len=64, optional=(), message=None):
+    """
+    Decorator that validates required query parameters before a view runs.
+    
+    Requests with a missing, empty or oversized parameter are answered with
+    400 right away, without reaching the view (or any upstream API). The
+    parameter values are passed to the view as keyword arguments.
+    
+    Args:
+        *names (str): Names of the required query parameters
+        max_len (int): Maximum accepted length of each value (default: 64)
+        optional (tuple): Names of optional parameters, listed in the 400 response
+        message (str): Optional hint included in the 400 response
+    
+    Returns:
+        callable: Decorator wrapping the view function
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            values = {name: request.args.get(name) for name in names}
+            invalid = [name for name, value in values.items() if not value or len(value) > max_len]
+            if invalid:
+                logger.warning("Missing or invalid parameters for %s: %s", request.path, ', '.join(invalid))
+                body = {
+                    'error': 'Missing or invalid parameters',
+                    'required': list(names),
+                    'invalid': invalid,
+                    'max_len': max_len
+                }
+                if optional:
+                    body['optional'] = list(optional)
+                if message:
+                    body['message'] = message
+                return jsonify(body), 400
+            return view(*args, **kwargs, **values)
+        return wrapper
+    return decorator
+
+# Worker pool for issuing independent upstream calls concurrently
+_POOL = ThreadPoolExecutor(max_workers=16)
+# Background cache-warming calls get their own small pool, so slow
+# prefetches never hold up the fan-out of user-facing requests. The
+# semaphore drops prefetches instead of queueing them when it is busy.
+_PREFETCH_WORKERS = 4
+_PREFETCH_POOL = ThreadPoolExecutor(max_workers=_PREFETCH_WORKERS, thread_name_prefix='prefetch')
+_PREFETCH_SLOTS = threading.BoundedSemaphore(_PREFETCH_WORKERS)
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    JSON provider that serializes with orjson instead of the stdlib json module.
+    
+    Amadeus flight and hotel payloads can be hundreds of KB of nested
+    dicts; orjson encodes them several times faster. Output follows the
+    ``sort_keys`` and ``compact`` class attributes, which are set so keys
+    keep their upstream order and responses are never indented, even in
+    debug mode.
+    """
+
+    sort_keys = False
+    compact = True
+
+    def dumps(self, obj, **kwargs):
+        option = 0
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
+
+@app.errorhandler(CircuitOpenError)
+def handle_circuit_open(error):
+    """Fails fast with 503 while an upstream API is unavailable."""
+    logger.warning("Rejecting request, %s", error)
+    response = jsonify({
+        'error': 'Service temporarily unavailable',
+        'message': f'{error.name} is not responding. Please try again in {error.retry_after} seconds.'
+    })
+    response.status_code = 503
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+def _conditional_json(data, max_age=900):
+    """
+    Builds a cacheable JSON response that honors If-None-Match.
+    
+    The ETag is a hash of the serialized body, so clients (and proxies)
+    revalidating an unchanged result get an empty 304 instead of the
+    full payload again.
+    
+    Args:
+        data: JSON-serializable response data
+        max_age (int): Seconds clients may reuse the response (default: 15 minutes)
+    
+    Returns:
+        Response: 200 response with ETag and Cache-Control headers, or
+                  304 Not Modified if the client already has this body
+    """
+    response = jsonify(data)
+    response.set_etag(hashlib.blake2b(response.get_data(), digest_size=8).hexdigest())
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    return response.make_conditional(request)
 
 @app.route('/')
 def hello_world():
@@ -30,8 +214,21 @@ def hello_world():
         'version': '1.0.0'
     })
 
+@app.route('/api/cache/stats', methods=['GET'])
+def api_cache_stats():
+    """
+    Report hit/miss statistics of the in-process response caches.
+    
+    Statistics are per worker process.
+    
+    Returns:
+        JSON: Mapping of cached function name to hits, misses, size and TTL
+    """
+    return jsonify(cache_stats())
+
 @app.route('/api/flights', methods=['GET'])
-def api_search_flights():
+@require_params('origin', 'destination', 'departure_date', optional=('adults',))
+def api_search_flights(origin, destination, departure_date):
     """
     Search for flights between origin and destination.
     
@@ -45,48 +242,60 @@ def api_search_flights():
         JSON: List of flight offers or error message
     """
     try:
-        origin = request.args.get('origin')
-        destination = request.args.get('destination')
-        departure_date = request.args.get('departure_date')
         adults = request.args.get('adults', 1, type=int)
 
-        # Validate required parameters
-        if not all([origin, destination, departure_date]):
-            logger.warning(f"Missing parameters for flight search: origin={origin}, destination={destination}, date={departure_date}")
-            return jsonify({
-                'error': 'Missing required parameters',
-                'required': ['origin', 'destination', 'departure_date'],
-                'optional': ['adults']
-            }), 400
-
-        # Validate date format (basic check)
-        if len(departure_date) != 10 or departure_date.count('-') != 2:
-            logger.warning(f"Invalid date format: {departure_date}")
-            return jsonify({
-                'error': 'Invalid date format. Use YYYY-MM-DD format'
-            }), 400
+        # Validate the route before spending an Amadeus call on it
+        origin, destination, error = _validate_route(origin, destination, departure_date)
+        if error:
+            return error
 
-        logger.info(f"Searching flights: {origin} -> {destination} on {departure_date}")
+        logger.info("Searching flights: %s -> %s on %s", origin, destination, departure_date)
         flights = search_flights(origin, destination, departure_date, adults)
 
         if flights:
-            logger.info(f"Found {len(flights)} flight options")
+            logger.info("Found %d flight options", len(flights))
             return jsonify(flights)
         else:
-            logger.warning(f"No flights found for {origin} -> {destination}")
+            logger.warning("No flights found for %s -> %s", origin, destination)
             return jsonify({
                 'error': 'Could not retrieve flight offers',
                 'message': 'No flights available for the specified route and date. Try different dates or nearby airports.'
             }), 500
+    except CircuitOpenError:
+        # Answered with a 503 by handle_circuit_open
+        raise
     except Exception as e:
-        logger.error(f"Unexpected error in flight search: {str(e)}", exc_info=True)
+        logger.error("Unexpected error in flight search: %s", e, exc_info=True)
         return jsonify({
             'error': 'Internal server error',
             'message': 'An unexpected error occurred. Please try again later.'
         }), 500
 
+def _prefetch_activities(latitude, longitude):
+    """
+    Warms the activity cache for a location in the background.
+    
+    Users who look up airports for a destination usually ask for its
+    activities next; fetching them now lets the follow-up /api/activities
+    request be served from the cache. Skipped when too many prefetches
+    are already running.
+    """
+    if not _PREFETCH_SLOTS.acquire(blocking=False):
+        return
+
+    def prefetch():
+        try:
+            search_activities(latitude, longitude)
+        except Exception as e:
+            logger.debug("Activity prefetch failed: %s", e)
+        finally:
+            _PREFETCH_SLOTS.release()
+
+    _PREFETCH_POOL.submit(prefetch)
+
 @app.route('/api/nearest-airports', methods=['GET'])
-def api_get_nearest_airports():
+@require_params('keyword', message='Please provide a location name (e.g., city or airport name)')
+def api_get_nearest_airports(keyword):
     """
     Find nearest airports to a given location.
     
@@ -101,63 +310,47 @@ def api_get_nearest_airports():
         JSON: List of nearest airports with distances or error message
     """
     try:
-        keyword = request.args.get('keyword')
-        if not keyword:
-            logger.warning("Missing keyword parameter for nearest airports search")
-            return jsonify({
-                'error': 'Missing required parameter: keyword',
-                'message': 'Please provide a location name (e.g., city or airport name)'
-            }), 400
-
-        logger.info(f"Searching for location: {keyword}")
-        locations = search_location(keyword)
+        logger.info("Searching for location: %s", keyword)
+        geo_code = resolve_geocode(keyword)
         
-        if not locations:
-            logger.warning(f"Location not found: {keyword}")
+        if not geo_code:
+            logger.warning("Location not found or has no coordinates: %s", keyword)
             return jsonify({
                 'error': 'Could not find location',
-                'message': f'No location found matching "{keyword}". Try a different search term.'
+                'message': f'No location with coordinates found matching "{keyword}". Try a different search term.'
             }), 404
 
-        # Check if location has geographic coordinates
-        if not locations[0].get('geoCode'):
-            logger.warning(f"Location found but no coordinates: {keyword}")
-            return jsonify({
-                'error': 'Location found but no coordinates available',
-                'message': 'The location was found but geographic coordinates are not available.'
-            }), 404
+        latitude, longitude = geo_code
 
-        geo_code = locations[0]['geoCode']
-        latitude = geo_code.get('latitude')
-        longitude = geo_code.get('longitude')
-        
-        if not latitude or not longitude:
-            logger.warning(f"Invalid coordinates for location: {keyword}")
-            return jsonify({
-                'error': 'Invalid location coordinates'
-            }), 500
+        _prefetch_activities(latitude, longitude)
 
-        logger.info(f"Finding airports near {latitude}, {longitude}")
+        logger.info("Finding airports near %s, %s", latitude, longitude)
         airports = get_nearest_airports(latitude, longitude)
 
         if airports:
-            logger.info(f"Found {len(airports)} nearby airports")
-            return jsonify(airports)
+            logger.info("Found %d nearby airports", len(airports))
+            return _conditional_json(airports)
         else:
-            logger.warning(f"No airports found near {keyword}")
+            logger.warning("No airports found near %s", keyword)
             return jsonify({
                 'error': 'Could not retrieve nearest airports',
                 'message': 'No airports found near the specified location.'
             }), 500
+    except CircuitOpenError:
+        # Answered with a 503 by handle_circuit_open
+        raise
     except Exception as e:
-        logger.error(f"Unexpected error in nearest airports search: {str(e)}", exc_info=True)
+        logger.error("Unexpected error in nearest airports search: %s", e, exc_info=True)
         return jsonify({
             'error': 'Internal server error',
             'message': 'An unexpected error occurred. Please try again later.'
         }), 500
 
 @app.route('/api/visa-requirements', methods=['GET'])
-def api_get_visa_requirements():
+@require_params('origin', 'destination', 'nationality',
+                message='All three parameters (origin, destination, nationality) are required. '
+                        'Use ISO country codes (e.g., US, FR, GB).')
+def api_get_visa_requirements(origin, destination, nationality):
     """
     Get visa requirements for travel between countries.
     
@@ -175,53 +368,42 @@ def api_get_visa_requirements():
         JSON: Visa requirements information or error message
     """
     try:
-        origin = request.args.get('origin')
-        destination = request.args.get('destination')
-        nationality = request.args.get('nationality')
-
-        if not all([origin, destination, nationality]):
-            logger.warning(f"Missing parameters for visa check: origin={origin}, destination={destination}, nationality={nationality}")
-            return jsonify({
-                'error': 'Missing required parameters',
-                'required': ['origin', 'destination', 'nationality'],
-                'message': 'All three parameters (origin, destination, nationality) are required. Use ISO country codes (e.g., US, FR, GB).'
-            }), 400
-
-        # Validate country codes (basic check - should be 2 characters)
-        if not all(len(code) == 2 for code in [origin, destination, nationality]):
-            logger.warning(f"Invalid country code format: origin={origin}, destination={destination}, nationality={nationality}")
+        # Validate country codes locally instead of spending a Sherpa call on them
+        if not {origin.upper(), destination.upper(), nationality.upper()} <= _ISO_COUNTRY_CODES:
+            logger.warning("Invalid country code format: origin=%s, destination=%s, nationality=%s", origin, destination, nationality)
             return jsonify({
                 'error': 'Invalid country code format',
                 'message': 'Country codes must be 2-letter ISO codes (e.g., US, FR, GB)'
             }), 400
 
-        logger.info(f"Checking visa requirements: {nationality} traveling from {origin} to {destination}")
+        logger.info("Checking visa requirements: %s traveling from %s to %s", nationality, origin, destination)
         visa_info = get_visa_requirements(origin, destination, nationality)
 
         if visa_info:
             logger.info("Visa requirements retrieved successfully")
-            return jsonify(visa_info)
+            return _conditional_json(visa_info)
         else:
-            logger.warning(f"Could not retrieve visa info for {origin} -> {destination} (nationality: {nationality})")
+            logger.warning("Could not retrieve visa info for %s -> %s (nationality: %s)", origin, destination, nationality)
             return jsonify({
                 'error': 'Could not retrieve visa information',
                 'message': 'Unable to fetch visa requirements. Please check your API key and try again.'
             }), 500
     except ValueError as e:
-        logger.error(f"Configuration error in visa check: {str(e)}")
+        logger.error("Configuration error in visa check: %s", e)
         return jsonify({
             'error': 'Configuration error',
             'message': 'Sherpa API key is not configured. Please set SHERPA_API_KEY in your environment variables.'
         }), 500
     except Exception as e:
-        logger.error(f"Unexpected error in visa requirements check: {str(e)}", exc_info=True)
+        logger.error("Unexpected error in visa requirements check: %s", e, exc_info=True)
         return jsonify({
             'error': 'Internal server error',
             'message': 'An unexpected error occurred. Please try again later.'
         }), 500
 
 @app.route('/api/hotels', methods=['GET'])
-def api_search_hotels():
+@require_params('city_code', message='Please provide an IATA city code (e.g., NYC, PAR, LON)')
+def api_search_hotels(city_code):
     """
     Search for hotels in a specific city.
     
@@ -232,38 +414,31 @@ def api_search_hotels():
         JSON: List of hotel offers or error message
     """
     try:
-        city_code = request.args.get('city_code')
-        if not city_code:
-            logger.warning("Missing city_code parameter for hotel search")
-            return jsonify({
-                'error': 'Missing required parameter: city_code',
-                'message': 'Please provide an IATA city code (e.g., NYC, PAR, LON)'
-            }), 400
-
-        logger.info(f"Searching hotels in city: {city_code}")
+        logger.info("Searching hotels in city: %s", city_code)
         hotels = search_hotels(city_code)
         
         if hotels:
-            logger.info(f"Found hotel offers for {city_code}")
-            return jsonify(hotels)
+            logger.info("Found hotel offers for %s", city_code)
+            return _conditional_json(hotels)
         else:
-            logger.warning(f"No hotels found for city: {city_code}")
+            logger.warning("No hotels found for city: %s", city_code)
             return jsonify({
                 'error': 'Could not retrieve hotel offers',
                 'message': f'No hotels found for city code "{city_code}". Try a different city code.'
             }), 500
+    except CircuitOpenError:
+        # Answered with a 503 by handle_circuit_open
+        raise
     except Exception as e:
-        logger.error(f"Unexpected error in hotel search: {str(e)}", exc_info=True)
+        logger.error("Unexpected error in hotel search: %s", e, exc_info=True)
         return jsonify({
             'error': 'Internal server error',
             'message': 'An unexpected error occurred. Please try again later.'
         }), 500
 
 @app.route('/api/cars', methods=['GET'])
-def api_search_cars():
-    city_code = request.args.get('city_code')
-    if not city_code:
-        return jsonify({'error': 'Missing required parameter: city_code'}), 400
+@require_params('city_code')
+def api_search_cars(city_code):
     cars = search_cars(city_code)
     if cars:
         return jsonify(cars)
@@ -271,7 +446,8 @@ def api_search_cars():
         return jsonify({'error': 'Car search not yet available'}), 501
 
 @app.route('/api/activities', methods=['GET'])
-def api_search_activities():
+@require_params('keyword', message='Please provide a location name to search for activities')
+def api_search_activities(keyword):
     """
     Search for activities near a given location.
     
@@ -285,61 +461,161 @@ def api_search_activities():
         JSON: List of activities or error message
     """
     try:
-        keyword = request.args.get('keyword')
-        if not keyword:
-            logger.warning("Missing keyword parameter for activity search")
-            return jsonify({
-                'error': 'Missing required parameter: keyword',
-                'message': 'Please provide a location name to search for activities'
-            }), 400
-
-        logger.info(f"Searching for location: {keyword}")
-        locations = search_location(keyword)
+        logger.info("Searching for location: %s", keyword)
+        geo_code = resolve_geocode(keyword)
         
-        if not locations:
-            logger.warning(f"Location not found: {keyword}")
+        if not geo_code:
+            logger.warning("Location not found or has no coordinates: %s", keyword)
             return jsonify({
                 'error': 'Could not find location',
-                'message': f'No location found matching "{keyword}". Try a different search term.'
-            }), 404
-
-        if not locations[0].get('geoCode'):
-            logger.warning(f"Location found but no coordinates: {keyword}")
-            return jsonify({
-                'error': 'Location found but no coordinates available'
+                'message': f'No location with coordinates found matching "{keyword}". Try a different search term.'
             }), 404
 
-        geo_code = locations[0]['geoCode']
-        latitude = geo_code.get('latitude')
-        longitude = geo_code.get('longitude')
-        
-        if not latitude or not longitude:
-            logger.warning(f"Invalid coordinates for location: {keyword}")
-            return jsonify({
-                'error': 'Invalid location coordinates'
-            }), 500
+        latitude, longitude = geo_code
 
-        logger.info(f"Searching activities near {latitude}, {longitude}")
+        logger.info("Searching activities near %s, %s", latitude, longitude)
         activities = search_activities(latitude, longitude)
         
         if activities:
-            logger.info(f"Found activities near {keyword}")
+            logger.info("Found activities near %s", keyword)
             return jsonify(activities)
         else:
-            logger.warning(f"No activities found near {keyword}")
+            logger.warning("No activities found near %s", keyword)
             return jsonify({
                 'error': 'Could not retrieve activities',
                 'message': f'No activities found near "{keyword}". Try a different location.'
             }), 500
+    except CircuitOpenError:
+        # Answered with a 503 by handle_circuit_open
+        raise
+    except Exception as e:
+        logger.error("Unexpected error in activity search: %s", e, exc_info=True)
+        return jsonify({
+            'error': 'Internal server error',
+            'message': 'An unexpected error occurred. Please try again later.'
+        }), 500
+
+@app.route('/api/destination', methods=['GET'])
+@require_params('keyword', message='Please provide a location name (e.g., city or airport name)')
+def api_search_destination(keyword):
+    """
+    Find nearest airports and activities for a location in one request.
+    
+    The location is resolved once, then the airport and activity searches
+    around its coordinates are issued concurrently. This replaces two
+    calls to /api/nearest-airports and /api/activities, which would each
+    resolve the location and wait on their searches one after the other.
+    
+    Query Parameters:
+        keyword (str): Location name (city, airport, landmark, etc.)
+    
+    Returns:
+        JSON: Object with 'airports' and 'activities' lists (empty when a
+              search found nothing) or error message
+    """
+    try:
+        logger.info("Searching for location: %s", keyword)
+        geo_code = resolve_geocode(keyword)
+
+        if not geo_code:
+            logger.warning("Location not found or has no coordinates: %s", keyword)
+            return jsonify({
+                'error': 'Could not find location',
+                'message': f'No location with coordinates found matching "{keyword}". Try a different search term.'
+            }), 404
+
+        latitude, longitude = geo_code
+
+        logger.info("Searching airports and activities near %s, %s", latitude, longitude)
+        futures = {
+            'airports': _POOL.submit(get_nearest_airports, latitude, longitude),
+            'activities': _POOL.submit(search_activities, latitude, longitude)
+        }
+        destination = {name: future.result() or [] for name, future in futures.items()}
+
+        if any(destination.values()):
+            return jsonify(destination)
+        else:
+            logger.warning("No airports or activities found near %s", keyword)
+            return jsonify({
+                'error': 'Could not retrieve destination information',
+                'message': f'No airports or activities found near "{keyword}". Try a different location.'
+            }), 500
+    except CircuitOpenError:
+        # Answered with a 503 by handle_circuit_open
+        raise
+    except Exception as e:
+        logger.error("Unexpected error in destination search: %s", e, exc_info=True)
+        return jsonify({
+            'error': 'Internal server error',
+            'message': 'An unexpected error occurred. Please try again later.'
+        }), 500
+
+def _search_activities_near(keyword):
+    """Resolves a location keyword and searches activities near it."""
+    geo_code = resolve_geocode(keyword)
+    if not geo_code:
+        return None
+    return search_activities(*geo_code)
+
+@app.route('/api/trip', methods=['GET'])
+@require_params('origin', 'destination', 'departure_date', optional=('adults',))
+def api_search_trip(origin, destination, departure_date):
+    """
+    Search flights, hotels and activities for a single trip.
+    
+    The three Amadeus searches are independent, so they are issued
+    concurrently and the endpoint takes as long as the slowest one rather
+    than the sum of all three. Hotels and activities are searched at the
+    destination.
+    
+    Query Parameters:
+        origin (str): IATA airport code (e.g., 'JFK')
+        destination (str): IATA city or airport code (e.g., 'PAR')
+        departure_date (str): Date in YYYY-MM-DD format
+        adults (int, optional): Number of adult passengers (default: 1)
+    
+    Returns:
+        JSON: Object with 'flights', 'hotels' and 'activities' lists
+              (empty when a search found nothing) or error message
+    """
+    try:
+        adults = request.args.get('adults', 1, type=int)
+
+        # Validate the route before spending an Amadeus call on it
+        origin, destination, error = _validate_route(origin, destination, departure_date)
+        if error:
+            return error
+
+        logger.info("Searching trip: %s -> %s on %s", origin, destination, departure_date)
+        futures = {
+            'flights': _POOL.submit(search_flights, origin, destination, departure_date, adults),
+            'hotels': _POOL.submit(search_hotels, destination),
+            'activities': _POOL.submit(_search_activities_near, destination)
+        }
+        trip = {name: future.result() or [] for name, future in futures.items()}
+
+        if any(trip.values()):
+            return jsonify(trip)
+        else:
+            logger.warning("No trip options found for %s -> %s", origin, destination)
+            return jsonify({
+                'error': 'Could not retrieve trip options',
+                'message': 'No flights, hotels or activities found for the specified trip.'
+            }), 500
+    except CircuitOpenError:
+        # Answered with a 503 by handle_circuit_open
+        raise
     except Exception as e:
-        logger.error(f"Unexpected error in activity search: {str(e)}", exc_info=True)
+        logger.error("Unexpected error in trip search: %s", e, exc_info=True)
         return jsonify({
             'error': 'Internal server error',
             'message': 'An unexpected error occurred. Please try again later.'
         }), 500
 
 if __name__ == '__main__':
-    # Run the Flask development server
-    # In production, use a proper WSGI server like Gunicorn
+    # Run the Flask development server (debug mode only with
+    # FLASK_DEBUG=1, never with the reloader). In production, use Gunicorn:
+    #   gunicorn -c gunicorn.conf.py app:app
     logger.info("Starting Travel Agent Assistant API server")
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    app.run(debug=os.getenv("FLASK_DEBUG") == "1", use_reloader=False, host='0.0.0.0', port=5000)
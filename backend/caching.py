@@ -0,0 +1,236 @@
+"""
+Response caching helpers.
+
+This module provides small in-process caches used by the API integration
+modules to avoid repeating identical upstream calls. Results are kept per
+worker process for a limited time (TTL).
+"""
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+import functools
+import logging
+import threading
+import time
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Statistics callbacks of every ttl_cached function, keyed by function name
+_REGISTRY = {}
+
+class PartitionedTTLCache:
+    """
+    TTL cache that groups entries under a primary key.
+
+    Keys are tuples. The first ``primary_length`` items select a partition
+    (e.g. an ``(origin, destination)`` route) holding the most recent
+    ``partition_size`` entries for the remaining items (e.g. date and
+    passengers). At most ``maxsize`` partitions are kept; the least
+    recently used one is evicted first. This matches how users search
+    (same route, varying dates) while keeping memory bounded. As with
+    ``TTLCache``, expired entries are removed whenever the cache is used.
+
+    Like ``TTLCache``, instances are not thread-safe on their own.
+    """
+
+    def __init__(self, maxsize, ttl, partition_size=8, primary_length=2, timer=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.partition_size = partition_size
+        self.primary_length = primary_length
+        self.timer = timer
+        self._partitions = OrderedDict()
+        # (stored_at, primary) for every insertion, oldest first
+        self._expiry = deque()
+
+    def _split(self, key):
+        return key[:self.primary_length], key[self.primary_length:]
+
+    def expire(self, now=None):
+        """Removes expired entries, and partitions left empty, from the cache."""
+        if now is None:
+            now = self.timer()
+        while self._expiry and now - self._expiry[0][0] >= self.ttl:
+            _, primary = self._expiry.popleft()
+            entries = self._partitions.get(primary)
+            if entries is None:
+                continue
+            # Entries are stored newest first, so expired ones are at the end
+            while entries and now - entries[-1][1] >= self.ttl:
+                entries.pop()
+            if not entries:
+                del self._partitions[primary]
+
+    def get(self, key, default=None):
+        self.expire()
+        primary, secondary = self._split(key)
+        entries = self._partitions.get(primary)
+        if not entries:
+            return default
+
+        for entry_key, _, value in entries:
+            if entry_key == secondary:
+                self._partitions.move_to_end(primary)
+                return value
+        return default
+
+    def __setitem__(self, key, value):
+        now = self.timer()
+        self.expire(now)
+        primary, secondary = self._split(key)
+        entries = self._partitions.get(primary)
+        if entries is None:
+            entries = deque(maxlen=self.partition_size)
+            self._partitions[primary] = entries
+            if len(self._partitions) > self.maxsize:
+                self._partitions.popitem(last=False)
+        else:
+            self._partitions.move_to_end(primary)
+            for entry in [entry for entry in entries if entry[0] == secondary]:
+                entries.remove(entry)
+        entries.appendleft((secondary, now, value))
+        self._expiry.append((now, primary))
+
+    def __len__(self):
+        self.expire()
+        return sum(len(entries) for entries in self._partitions.values())
+
+    def clear(self):
+        self._partitions.clear()
+        self._expiry.clear()
+
+def ttl_cached(cache, key, coalesce=False):
+    """
+    Decorator that stores successful results of a function in a cache.
+
+    Only truthy results are stored, so failed lookups (None) and empty
+    result sets are retried on the next call instead of being served
+    from the cache until they expire.
+
+    With ``coalesce=True``, concurrent cache misses for the same key also
+    share a single call, like ``single_flight``. The result is stored
+    before the in-flight call is released, so a caller arriving in
+    between finds it in the cache rather than calling again.
+
+    Args:
+        cache (TTLCache | PartitionedTTLCache): Cache instance used to store results
+        key (callable): Function building the cache key; it receives the
+            same arguments as the decorated function
+        coalesce (bool): Whether concurrent misses share one call (default: False)
+
+    Returns:
+        callable: Decorator wrapping the function with the cache
+    """
+    lock = threading.Lock()
+    stats = {'hits': 0, 'misses': 0}
+    in_flight = {}
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            cache_key = key(*args, **kwargs)
+            with lock:
+                result = cache.get(cache_key)
+                stats['hits' if result is not None else 'misses'] += 1
+                future, is_leader = None, False
+                if result is None and coalesce:
+                    future = in_flight.get(cache_key)
+                    if future is None:
+                        future = in_flight[cache_key] = Future()
+                        is_leader = True
+            if result is not None:
+                logger.debug("Cache hit for %s: %r", func.__name__, cache_key)
+                return result
+            if future is not None and not is_leader:
+                logger.debug("Joining in-flight %s call: %r", func.__name__, cache_key)
+                return future.result()
+
+            try:
+                result = func(*args, **kwargs)
+            except BaseException as error:
+                if is_leader:
+                    with lock:
+                        del in_flight[cache_key]
+                    future.set_exception(error)
+                raise
+            with lock:
+                if result:
+                    cache[cache_key] = result
+                if is_leader:
+                    del in_flight[cache_key]
+            if is_leader:
+                future.set_result(result)
+            return result
+
+        def cache_clear():
+            with lock:
+                cache.clear()
+                stats.update(hits=0, misses=0)
+
+        def cache_info():
+            with lock:
+                return dict(stats, size=len(cache), ttl=cache.ttl)
+
+        wrapper.cache = cache
+        wrapper.cache_clear = cache_clear
+        wrapper.cache_info = cache_info
+        _REGISTRY[func.__name__] = cache_info
+        return wrapper
+    return decorator
+
+def cache_stats():
+    """
+    Returns hit/miss statistics for every ttl_cached function.
+
+    Returns:
+        dict: Mapping of function name to its 'hits', 'misses', current
+              'size' (number of cached entries) and 'ttl' in seconds
+    """
+    return {name: cache_info() for name, cache_info in _REGISTRY.items()}
+
+def single_flight(key):
+    """
+    Decorator that coalesces concurrent identical calls.
+
+    While a call for a given key is in flight, other threads calling with
+    the same key wait for it and share its result (or exception) instead
+    of issuing their own upstream request.
+
+    Args:
+        key (callable): Function building the coalescing key; it receives
+            the same arguments as the decorated function
+
+    Returns:
+        callable: Decorator wrapping the function
+    """
+    lock = threading.Lock()
+    in_flight = {}
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            call_key = key(*args, **kwargs)
+            with lock:
+                future = in_flight.get(call_key)
+                is_leader = future is None
+                if is_leader:
+                    future = Future()
+                    in_flight[call_key] = future
+
+            if not is_leader:
+                logger.debug("Joining in-flight %s call: %r", func.__name__, call_key)
+                return future.result()
+
+            try:
+                result = func(*args, **kwargs)
+            except BaseException as error:
+                future.set_exception(error)
+                raise
+            else:
+                future.set_result(result)
+                return result
+            finally:
+                with lock:
+                    del in_flight[call_key]
+        return wrapper
+    return decorator
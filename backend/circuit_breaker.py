@@ -0,0 +1,131 @@
+"""
+Circuit breaker for upstream API calls.
+
+When an upstream provider keeps failing, the breaker opens and further
+calls fail immediately instead of each waiting on the network. After a
+cool-down period a single probe call is let through; if it succeeds the
+breaker closes again.
+"""
+import logging
+import math
+import threading
+import time
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+class CircuitOpenError(RuntimeError):
+    """
+    Raised when a call is rejected because the circuit breaker is open.
+
+    Attributes:
+        name (str): Name of the protected upstream service
+        retry_after (int): Seconds until the breaker lets a probe call through
+    """
+
+    def __init__(self, name, retry_after):
+        self.name = name
+        self.retry_after = retry_after
+        RuntimeError.__init__(self, f"{name} is unavailable, retry in {retry_after}s")
+
+class CircuitBreaker:
+    """
+    Closed -> open -> half-open circuit breaker.
+
+    The breaker opens after ``fail_max`` consecutive failures. While open,
+    calls raise CircuitOpenError without reaching the upstream service.
+    Once ``reset_timeout`` seconds have passed, one probe call is allowed
+    (half-open): success closes the breaker, failure re-opens it.
+
+    Args:
+        name (str): Name of the protected service, used in logs and errors
+        fail_max (int): Consecutive failures before the breaker opens
+        reset_timeout (float): Seconds to stay open before probing
+        is_failure (callable): Predicate deciding whether an exception counts
+            as an upstream failure; others (e.g. bad requests) are re-raised
+            without affecting the failure count or the breaker state. Defaults to counting every exception.
+        timer (callable): Clock used for timeouts (default: time.monotonic)
+    """
+
+    def __init__(self, name, fail_max=5, reset_timeout=30, is_failure=None, timer=time.monotonic):
+        self.name = name
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self.is_failure = is_failure or (lambda error: True)
+        self.timer = timer
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    @property
+    def state(self):
+        """Current state: 'closed', 'open' or 'half-open'."""
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if self._probing or self.timer() - self._opened_at >= self.reset_timeout:
+                return 'half-open'
+            return 'open'
+
+    def call(self, func, *args, **kwargs):
+        """
+        Calls ``func`` through the breaker.
+
+        Returns:
+            The result of ``func``
+
+        Raises:
+            CircuitOpenError: If the breaker is open (or a probe is already running)
+        """
+        with self._lock:
+            if self._opened_at is not None:
+                remaining = self.reset_timeout - (self.timer() - self._opened_at)
+                if remaining > 0 or self._probing:
+                    raise CircuitOpenError(self.name, max(1, math.ceil(remaining)))
+                self._probing = True
+
+        try:
+            result = func(*args, **kwargs)
+        except Exception as error:
+            if self.is_failure(error):
+                self._record_failure()
+            else:
+                # Says nothing about upstream health; only ends a probe
+                self._end_probe()
+            raise
+        except BaseException:
+            # Interrupted (e.g. a gevent timeout); don't leave a probe hanging
+            self._end_probe()
+            raise
+        self._record_success()
+        return result
+
+    def reset(self):
+        """Closes the breaker and forgets past failures."""
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def _end_probe(self):
+        """Lets another probe through without changing the failure count."""
+        with self._lock:
+            self._probing = False
+
+    def _record_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("%s circuit closed", self.name)
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def _record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.fail_max:
+                if not self._probing:
+                    logger.warning("%s circuit opened after %d consecutive failures", self.name, self._failures)
+                self._opened_at = self.timer()
+                self._probing = False
@@ -0,0 +1,23 @@
+"""
+Gunicorn configuration for the Travel Agent Assistant API.
+
+Usage (from the backend directory):
+    gunicorn -c gunicorn.conf.py app:app
+
+Every setting can be overridden on the command line, e.g. ``-k gevent``
+to use gevent workers instead of threads.
+"""
+import multiprocessing
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+
+# Requests spend most of their time waiting on Amadeus/Sherpa, so each
+# worker runs several threads to overlap those upstream calls.
+workers = int(os.getenv("GUNICORN_WORKERS", 2 * multiprocessing.cpu_count() + 1))
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.getenv("GUNICORN_THREADS", 8))
+
+# Keep client connections open between requests from the frontend
+keepalive = 30
+timeout = 60
@@ -5,20 +5,81 @@ This module handles interactions with the Sherpa API for visa requirement
 information. Sherpa provides comprehensive visa requirement data for
 international travel.
 """
+import functools
 import logging
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from cachetools import TTLCache
 from dotenv import load_dotenv
 import os
 
-# Load environment variables
-load_dotenv()
+from caching import ttl_cached
+
+# Load environment variables from .env, unless the deployment already
+# provides the API key
+if not os.getenv("SHERPA_API_KEY"):
+    load_dotenv()
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 # Sherpa API base URL
 SHERPA_API_URL = "https://api.joinsherpa.com/v2"
+_TRIPS_URL = SHERPA_API_URL + "/trips"
+_TIMEOUT = 10  # seconds
+
+# Shared HTTP session, so the HTTPS connection to Sherpa is kept alive
+# between visa lookups instead of renegotiating TLS on every request.
+# Extra connections beyond the pool size are opened rather than waited for.
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(pool_connections=4, pool_maxsize=200, pool_block=False)
+_SESSION.mount('https://', _ADAPTER)
+_SESSION.mount('http://', _ADAPTER)
+_SESSION.headers.update({"Content-Type": "application/json"})
+
+# Sherpa API key, read by _reload_auth()
+_API_KEY = None
+
+def _reload_auth():
+    """
+    Reads SHERPA_API_KEY from the environment into the shared session.
+    
+    Called once at import, so the key is not looked up on every request.
+    Call it again after changing the environment (e.g. in tests).
+    """
+    global _API_KEY
+    _API_KEY = os.getenv("SHERPA_API_KEY")
+    if _API_KEY:
+        _SESSION.headers["Authorization"] = f"Bearer {_API_KEY}"
+    else:
+        _SESSION.headers.pop("Authorization", None)
+
+_reload_auth()
+
+# Visa rules change on the order of weeks, so answers are kept for a day
+_VISA_CACHE = TTLCache(maxsize=4096, ttl=24 * 3600)
+
+def _trip_key(origin, destination, nationality):
+    return (origin.upper(), destination.upper(), nationality.upper())
+
+@functools.lru_cache(maxsize=4096)
+def _trip_payload(origin, destination, nationality):
+    """
+    Builds the Sherpa trip payload for upper-cased ISO country codes.
+    
+    Payloads are memoised per trip, so callers must not modify the
+    returned dict.
+    """
+    return {
+        "trip": {
+            "origin": {"countryCode": origin},
+            "destination": {"countryCode": destination},
+            "nationality": {"countryCode": nationality}
+        }
+    }
 
+@ttl_cached(_VISA_CACHE, key=_trip_key, coalesce=True)
 def get_visa_requirements(origin, destination, nationality):
     """
     Gets visa requirements for a given trip from the Sherpa API.
@@ -41,38 +102,25 @@ def get_visa_requirements(origin, destination, nationality):
     Note:
         This function requires a valid Sherpa API key. The visa requirements
         feature is optional and the application will work for other features
-        without it.
+        without it. Successful answers are cached for 24 hours per
+        (origin, destination, nationality), and concurrent checks for the
+        same trip share a single Sherpa request.
     """
-    api_key = os.getenv("SHERPA_API_KEY")
-    if not api_key:
+    if not _API_KEY:
         logger.error("SHERPA_API_KEY not found in environment variables")
         raise ValueError("SHERPA_API_KEY must be set in the environment.")
 
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json"
-    }
-    
-    # Construct payload with country codes (ensure uppercase for ISO codes)
-    payload = {
-        "trip": {
-            "origin": {"countryCode": origin.upper()},
-            "destination": {"countryCode": destination.upper()},
-            "nationality": {"countryCode": nationality.upper()}
-        }
-    }
+    # Country codes are upper-cased as required for ISO codes
+    payload = _trip_payload(*_trip_key(origin, destination, nationality))
 
     try:
-        logger.info(f"Checking visa requirements: {nationality} -> {destination} (from {origin})")
-        response = requests.post(
-            f"{SHERPA_API_URL}/trips",
-            headers=headers,
-            json=payload,
-            timeout=10  # 10 second timeout
-        )
+        logger.info("Checking visa requirements: %s -> %s (from %s)", nationality, destination, origin)
+        response = _SESSION.post(_TRIPS_URL, json=payload, timeout=_TIMEOUT)
         response.raise_for_status()  # Raise an exception for bad status codes
         
-        visa_data = response.json()
+        # Parse the raw body with orjson; response.json() would first decode
+        # it to text (with charset detection) and then use the stdlib parser
+        visa_data = orjson.loads(response.content)
         logger.info("Visa requirements retrieved successfully")
         return visa_data
         
@@ -82,7 +130,7 @@ def get_visa_requirements(origin, destination, nationality):
     except requests.exceptions.HTTPError as e:
         # Handle HTTP errors (4xx, 5xx)
         status_code = e.response.status_code if e.response else 'N/A'
-        logger.error(f"Sherpa API HTTP error {status_code}: {str(e)}")
+        logger.error("Sherpa API HTTP error %s: %s", status_code, e)
         
         if status_code == 401:
             logger.error("Invalid or expired Sherpa API key")
@@ -92,11 +140,11 @@ def get_visa_requirements(origin, destination, nationality):
         return None
     except requests.exceptions.RequestException as e:
         # Handle network errors, connection errors, etc.
-        logger.error(f"Error calling Sherpa API: {str(e)}")
+        logger.error("Error calling Sherpa API: %s", e)
         return None
     except Exception as e:
         # Handle unexpected errors
-        logger.error(f"Unexpected error in visa requirements check: {str(e)}", exc_info=True)
+        logger.error("Unexpected error in visa requirements check: %s", e, exc_info=True)
         return None
 
 if __name__ == '__main__':
@@ -8,17 +8,23 @@ import unittest
 from unittest.mock import patch, MagicMock
 import os
 import sys
+import threading
+import requests
 
 # Add parent directory to path to import modules
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+import amadeus_api
 from amadeus_api import (
+    clear_caches,
     get_amadeus_client,
     search_flights,
     get_nearest_airports,
     search_hotels,
     search_location,
-    search_activities
+    search_activities,
+    resolve_geocode,
+    GeoCode
 )
 
 
@@ -33,10 +39,22 @@ class TestAmadeusAPI(unittest.TestCase):
             'AMADEUS_CLIENT_SECRET': 'test_client_secret'
         })
         self.env_patcher.start()
+        get_amadeus_client.cache_clear()
+        clear_caches()
+        amadeus_api._BREAKER.reset()
 
     def tearDown(self):
         """Clean up after tests."""
         self.env_patcher.stop()
+        get_amadeus_client.cache_clear()
+        clear_caches()
+        amadeus_api._BREAKER.reset()
+
+    def _serve_clients(self, mock_get_client, *clients):
+        """Makes a patched get_amadeus_client hand out the next client after each cache_clear."""
+        remaining = list(clients)
+        mock_get_client.side_effect = lambda: remaining[0]
+        mock_get_client.cache_clear.side_effect = lambda: remaining.pop(0)
 
     def test_get_amadeus_client_missing_credentials(self):
         """Test that ValueError is raised when credentials are missing."""
@@ -55,8 +73,54 @@ class TestAmadeusAPI(unittest.TestCase):
         self.assertIsNotNone(client)
         mock_client_class.assert_called_once_with(
             client_id='test_client_id',
-            client_secret='test_client_secret'
+            client_secret='test_client_secret',
+            http=amadeus_api._session_http
+        )
+
+    @patch('amadeus_api.Client')
+    def test_get_amadeus_client_reused(self, mock_client_class):
+        """Test that the Amadeus client is created once and reused."""
+        first = get_amadeus_client()
+        second = get_amadeus_client()
+
+        self.assertIs(first, second)
+        mock_client_class.assert_called_once()
+
+    @patch('amadeus_api._SESSION.request')
+    def test_client_requests_use_shared_session(self, mock_request):
+        """Test that SDK calls, including authentication, go through the session."""
+        token_response = MagicMock(
+            status_code=200,
+            headers=requests.structures.CaseInsensitiveDict({'content-type': 'application/json'}),
+            content=b'{"access_token": "token", "expires_in": 1799}'
         )
+        data_response = MagicMock(
+            status_code=200,
+            headers=requests.structures.CaseInsensitiveDict({'content-type': 'application/vnd.amadeus+json'}),
+            content=b'{"data": [{"name": "Paris"}]}'
+        )
+        mock_request.side_effect = [token_response, data_response]
+
+        response = get_amadeus_client().reference_data.locations.get(
+            keyword='Paris', subType='CITY'
+        )
+
+        self.assertEqual(response.data, [{'name': 'Paris'}])
+        self.assertEqual(mock_request.call_count, 2)
+        method, url = mock_request.call_args.args
+        self.assertEqual(method, 'GET')
+        self.assertIn('/v1/reference-data/locations', url)
+        self.assertEqual(mock_request.call_args.kwargs['headers']['Authorization'], 'Bearer token')
+
+    @patch('amadeus_api._SESSION.request')
+    def test_client_network_error(self, mock_request):
+        """Test that session network errors surface as Amadeus errors."""
+        from amadeus import ResponseError
+
+        mock_request.side_effect = requests.exceptions.ConnectionError()
+
+        with self.assertRaises(ResponseError):
+            get_amadeus_client().reference_data.locations.get(keyword='Paris', subType='CITY')
 
     @patch('amadeus_api.get_amadeus_client')
     def test_search_flights_success(self, mock_get_client):
@@ -93,6 +157,188 @@ class TestAmadeusAPI(unittest.TestCase):
         
         self.assertIsNone(result)
 
+    @patch('amadeus_api.get_amadeus_client')
+    def test_search_flights_cached(self, mock_get_client):
+        """Test that repeated flight searches are served from the cache."""
+        mock_client = MagicMock()
+        mock_response = MagicMock()
+        mock_response.data = [{'price': {'total': '500.00', 'currency': 'USD'}}]
+        mock_client.shopping.flight_offers_search.get.return_value = mock_response
+        mock_get_client.return_value = mock_client
+
+        first = search_flights('JFK', 'LHR', '2025-06-15', 1)
+        second = search_flights('jfk', 'lhr', '2025-06-15', 1)
+
+        self.assertEqual(first, second)
+        mock_client.shopping.flight_offers_search.get.assert_called_once()
+
+    @patch('amadeus_api.get_amadeus_client')
+    def test_search_flights_error_not_cached(self, mock_get_client):
+        """Test that failed flight searches are retried on the next call."""
+        from amadeus import ResponseError
+
+        mock_client = MagicMock()
+        mock_response = MagicMock()
+        mock_response.data = [{'price': {'total': '500.00', 'currency': 'USD'}}]
+        mock_client.shopping.flight_offers_search.get.side_effect = [
+            ResponseError(response=MagicMock()),
+            mock_response
+        ]
+        mock_get_client.return_value = mock_client
+
+        self.assertIsNone(search_flights('JFK', 'LHR', '2025-06-15', 1))
+        self.assertIsNotNone(search_flights('JFK', 'LHR', '2025-06-15', 1))
+        self.assertEqual(mock_client.shopping.flight_offers_search.get.call_count, 2)
+
+    @patch('amadeus_api.time.sleep')
+    @patch('amadeus_api.get_amadeus_client')
+    def test_search_flights_rate_limit_retried(self, mock_get_client, mock_sleep):
+        """Test that rate-limited flight searches are retried with backoff."""
+        from amadeus import ResponseError
+
+        mock_client = MagicMock()
+        mock_response = MagicMock()
+        mock_response.data = [{'price': {'total': '500.00', 'currency': 'USD'}}]
+        rate_limited = ResponseError(
+            response=MagicMock(status_code=429, headers={'Retry-After': '2'})
+        )
+        mock_client.shopping.flight_offers_search.get.side_effect = [
+            rate_limited,
+            mock_response
+        ]
+        mock_get_client.return_value = mock_client
+
+        result = search_flights('JFK', 'LHR', '2025-06-15', 1)
+
+        self.assertEqual(result, mock_response.data)
+        mock_sleep.assert_called_once()
+        self.assertGreaterEqual(mock_sleep.call_args.args[0], 2)
+
+    @patch('amadeus_api.time.sleep')
+    @patch('amadeus_api.get_amadeus_client')
+    def test_search_flights_long_retry_after_not_waited(self, mock_get_client, mock_sleep):
+        """Test that a Retry-After beyond the maximum backoff fails without sleeping."""
+        from amadeus import ResponseError
+
+        mock_client = MagicMock()
+        mock_client.shopping.flight_offers_search.get.side_effect = ResponseError(
+            response=MagicMock(status_code=429, headers={'Retry-After': '3600'})
+        )
+        mock_get_client.return_value = mock_client
+
+        result = search_flights('JFK', 'LHR', '2025-06-15', 1)
+
+        self.assertIsNone(result)
+        mock_sleep.assert_not_called()
+        mock_client.shopping.flight_offers_search.get.assert_called_once()
+
+    @patch('amadeus_api.time.sleep')
+    @patch('amadeus_api.get_amadeus_client')
+    def test_search_flights_client_error_not_retried(self, mock_get_client, mock_sleep):
+        """Test that non rate-limit errors fail without retrying."""
+        from amadeus import ResponseError
+
+        mock_client = MagicMock()
+        mock_client.shopping.flight_offers_search.get.side_effect = ResponseError(
+            response=MagicMock(status_code=400)
+        )
+        mock_get_client.return_value = mock_client
+
+        result = search_flights('JFK', 'LHR', '2025-06-15', 1)
+
+        self.assertIsNone(result)
+        mock_sleep.assert_not_called()
+        mock_client.shopping.flight_offers_search.get.assert_called_once()
+
+    @patch('amadeus_api.get_amadeus_client')
+    def test_search_flights_unauthorized_reauthenticates(self, mock_get_client):
+        """Test that a rejected token is retried once with a fresh client."""
+        from amadeus import ResponseError
+
+        stale_client = MagicMock()
+        stale_client.shopping.flight_offers_search.get.side_effect = ResponseError(
+            response=MagicMock(status_code=401)
+        )
+        fresh_client = MagicMock()
+        fresh_client.shopping.flight_offers_search.get.return_value = MagicMock(data=[{'id': '1'}])
+        self._serve_clients(mock_get_client, stale_client, fresh_client)
+
+        result = search_flights('JFK', 'LHR', '2025-06-15', 1)
+
+        self.assertEqual(result, [{'id': '1'}])
+        mock_get_client.cache_clear.assert_called_once()
+        fresh_client.shopping.flight_offers_search.get.assert_called_once()
+
+    @patch('amadeus_api.get_amadeus_client')
+    def test_concurrent_unauthorized_replace_client_once(self, mock_get_client):
+        """Test that simultaneous 401s build only one new client."""
+        from amadeus import ResponseError
+
+        callers = 4
+        all_rejected = threading.Barrier(callers, timeout=5)
+
+        def reject(**params):
+            all_rejected.wait()  # Every caller holds the stale client
+            raise ResponseError(response=MagicMock(status_code=401))
+
+        stale_client = MagicMock()
+        stale_client.shopping.flight_offers_search.get.side_effect = reject
+        fresh_client = MagicMock()
+        fresh_client.shopping.flight_offers_search.get.return_value = MagicMock(data=[{'id': '1'}])
+        spare_client = MagicMock()
+        self._serve_clients(mock_get_client, stale_client, fresh_client, spare_client)
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda day=day: results.append(
+                search_flights('JFK', 'LHR', '2025-06-%02d' % day, 1)))
+            for day in range(1, callers + 1)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(results, [[{'id': '1'}]] * callers)
+        mock_get_client.cache_clear.assert_called_once()
+        self.assertEqual(fresh_client.shopping.flight_offers_search.get.call_count, callers)
+        spare_client.shopping.flight_offers_search.get.assert_not_called()
+
+    @patch('amadeus_api.get_amadeus_client')
+    def test_search_flights_unauthorized_retried_once(self, mock_get_client):
+        """Test that a second 401 is not retried again."""
+        from amadeus import ResponseError
+
+        mock_client = MagicMock()
+        mock_client.shopping.flight_offers_search.get.side_effect = ResponseError(
+            response=MagicMock(status_code=401)
+        )
+        mock_get_client.return_value = mock_client
+
+        result = search_flights('JFK', 'LHR', '2025-06-15', 1)
+
+        self.assertIsNone(result)
+        self.assertEqual(mock_client.shopping.flight_offers_search.get.call_count, 2)
+
+    @patch('amadeus_api.get_amadeus_client')
+    def test_search_flights_circuit_opens(self, mock_get_client):
+        """Test that repeated server errors open the circuit breaker."""
+        from amadeus import ResponseError
+        from circuit_breaker import CircuitOpenError
+
+        mock_client = MagicMock()
+        mock_client.shopping.flight_offers_search.get.side_effect = ResponseError(
+            response=MagicMock(status_code=500)
+        )
+        mock_get_client.return_value = mock_client
+
+        for _ in range(5):
+            self.assertIsNone(search_flights('JFK', 'LHR', '2025-06-15', 1))
+
+        with self.assertRaises(CircuitOpenError):
+            search_flights('JFK', 'LHR', '2025-06-15', 1)
+        self.assertEqual(mock_client.shopping.flight_offers_search.get.call_count, 5)
+
     @patch('amadeus_api.get_amadeus_client')
     def test_search_location_success(self, mock_get_client):
         """Test successful location search."""
@@ -172,6 +418,34 @@ class TestAmadeusAPI(unittest.TestCase):
         self.assertIsNotNone(result)
         self.assertEqual(len(result), 1)
 
+    @patch('amadeus_api.search_location')
+    def test_resolve_geocode_cached(self, mock_search_location):
+        """Test that resolved coordinates are reused for the same keyword."""
+        mock_search_location.return_value = [
+            {'name': 'Paris', 'geoCode': {'latitude': 48.8566, 'longitude': 2.3522}}
+        ]
+
+        first = resolve_geocode('Paris')
+        second = resolve_geocode(' paris ')
+
+        self.assertEqual(first, GeoCode(latitude=48.8566, longitude=2.3522))
+        self.assertEqual(first, second)
+        mock_search_location.assert_called_once_with('Paris')
+
+    @patch('amadeus_api.search_location')
+    def test_resolve_geocode_not_found(self, mock_search_location):
+        """Test that unknown locations resolve to None."""
+        mock_search_location.return_value = None
+
+        self.assertIsNone(resolve_geocode('Nowhere'))
+
+    @patch('amadeus_api.search_location')
+    def test_resolve_geocode_missing_coordinates(self, mock_search_location):
+        """Test that a match without coordinates resolves to None."""
+        mock_search_location.return_value = [{'name': 'Paris', 'geoCode': {'latitude': 48.8566}}]
+
+        self.assertIsNone(resolve_geocode('Paris'))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -7,11 +7,14 @@ import unittest
 from unittest.mock import patch, MagicMock
 import sys
 import os
+import threading
+from concurrent.futures import wait
 
 # Add parent directory to path to import modules
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from app import app
+from amadeus_api import GeoCode
 
 
 class TestAppEndpoints(unittest.TestCase):
@@ -30,6 +33,30 @@ class TestAppEndpoints(unittest.TestCase):
         self.assertIn('status', data)
         self.assertEqual(data['status'], 'active')
 
+    def test_cache_stats_endpoint(self):
+        """Test that cache statistics are reported for the cached API calls."""
+        response = self.app.get('/api/cache/stats')
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertIn('search_flights', data)
+        self.assertIn('get_visa_requirements', data)
+        self.assertIn('hits', data['search_flights'])
+        self.assertIn('misses', data['search_flights'])
+
+    def test_json_provider_uses_orjson(self):
+        """Test that responses are serialized by the orjson provider."""
+        from app import OrjsonProvider
+
+        self.assertIsInstance(app.json, OrjsonProvider)
+        self.assertEqual(app.json.loads(app.json.dumps({'b': 1, 'a': [1, 2]})), {'a': [1, 2], 'b': 1})
+
+    def test_json_responses_compact_and_unsorted(self):
+        """Test that JSON keeps key order and is not indented."""
+        with app.app_context():
+            response = app.json.response({'b': 1, 'a': [1, 2]})
+
+        self.assertEqual(response.get_data(as_text=True), '{"b":1,"a":[1,2]}\n')
+
     def test_flight_search_missing_parameters(self):
         """Test flight search with missing parameters."""
         response = self.app.get('/api/flights')
@@ -37,6 +64,29 @@ class TestAppEndpoints(unittest.TestCase):
         data = response.get_json()
         self.assertIn('error', data)
 
+    @patch('app.get_visa_requirements')
+    def test_oversized_parameter_rejected(self, mock_get_visa):
+        """Test that oversized parameters are rejected before any upstream call."""
+        response = self.app.get('/api/visa-requirements?origin=US&destination=FR&nationality=' + 'A' * 10000)
+        self.assertEqual(response.status_code, 400)
+        data = response.get_json()
+        self.assertEqual(data['error'], 'Missing or invalid parameters')
+        self.assertEqual(data['required'], ['origin', 'destination', 'nationality'])
+        self.assertEqual(data['invalid'], ['nationality'])
+        self.assertEqual(data['max_len'], 64)
+        mock_get_visa.assert_not_called()
+
+    @patch('app.search_flights')
+    def test_oversized_flight_parameter_rejected(self, mock_search_flights):
+        """Test that an oversized airport code is rejected before calling Amadeus."""
+        response = self.app.get('/api/flights?origin=' + 'A' * 65 + '&destination=LHR&departure_date=2025-06-15')
+        self.assertEqual(response.status_code, 400)
+        data = response.get_json()
+        self.assertEqual(data['invalid'], ['origin'])
+        self.assertEqual(data['required'], ['origin', 'destination', 'departure_date'])
+        self.assertEqual(data['optional'], ['adults'])
+        mock_search_flights.assert_not_called()
+
     def test_flight_search_invalid_date_format(self):
         """Test flight search with invalid date format."""
         response = self.app.get('/api/flights?origin=JFK&destination=LHR&departure_date=2025/06/15')
@@ -44,6 +94,48 @@ class TestAppEndpoints(unittest.TestCase):
         data = response.get_json()
         self.assertIn('error', data)
 
+    def test_flight_search_non_numeric_date(self):
+        """Test flight search with a non-numeric date of the right shape."""
+        response = self.app.get('/api/flights?origin=JFK&destination=LHR&departure_date=aaaa-bb-cc')
+        self.assertEqual(response.status_code, 400)
+        data = response.get_json()
+        self.assertIn('error', data)
+
+    def test_date_validation_rejects_trailing_newline_and_non_ascii_digits(self):
+        """Test that only plain ASCII YYYY-MM-DD dates are accepted."""
+        from app import _is_valid_date
+
+        self.assertTrue(_is_valid_date('2025-06-15'))
+        self.assertFalse(_is_valid_date('2025-06-15\n'))
+        self.assertFalse(_is_valid_date('\u0662\u0660\u0662\u0665-06-15'))
+
+    @patch('app.search_flights')
+    def test_flight_search_nonexistent_date(self, mock_search_flights):
+        """Test flight search rejects well-formed dates that do not exist."""
+        response = self.app.get('/api/flights?origin=JFK&destination=LHR&departure_date=2025-02-30')
+        self.assertEqual(response.status_code, 400)
+        data = response.get_json()
+        self.assertIn('error', data)
+        mock_search_flights.assert_not_called()
+
+    @patch('app.search_flights')
+    def test_flight_search_invalid_airport_code(self, mock_search_flights):
+        """Test flight search rejects malformed airport codes without calling Amadeus."""
+        response = self.app.get('/api/flights?origin=JF1&destination=LHR&departure_date=2025-06-15')
+        self.assertEqual(response.status_code, 400)
+        data = response.get_json()
+        self.assertIn('error', data)
+        mock_search_flights.assert_not_called()
+
+    @patch('app.search_flights')
+    def test_flight_search_normalizes_airport_codes(self, mock_search_flights):
+        """Test flight search passes upper-cased airport codes to Amadeus."""
+        mock_search_flights.return_value = [{'price': {'total': '500.00'}}]
+
+        response = self.app.get('/api/flights?origin=jfk&destination=lhr&departure_date=2025-06-15')
+        self.assertEqual(response.status_code, 200)
+        mock_search_flights.assert_called_once_with('JFK', 'LHR', '2025-06-15', 1)
+
     @patch('app.search_flights')
     def test_flight_search_success(self, mock_search_flights):
         """Test successful flight search."""
@@ -70,6 +162,19 @@ class TestAppEndpoints(unittest.TestCase):
         data = response.get_json()
         self.assertIn('error', data)
 
+    @patch('app.search_flights')
+    def test_flight_search_circuit_open(self, mock_search_flights):
+        """Test flight search fails fast with 503 while Amadeus is unavailable."""
+        from circuit_breaker import CircuitOpenError
+
+        mock_search_flights.side_effect = CircuitOpenError('Amadeus API', 12)
+
+        response = self.app.get('/api/flights?origin=JFK&destination=LHR&departure_date=2025-06-15')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '12')
+        data = response.get_json()
+        self.assertIn('error', data)
+
     def test_nearest_airports_missing_keyword(self):
         """Test nearest airports search with missing keyword."""
         response = self.app.get('/api/nearest-airports')
@@ -77,13 +182,13 @@ class TestAppEndpoints(unittest.TestCase):
         data = response.get_json()
         self.assertIn('error', data)
 
-    @patch('app.search_location')
+    @patch('app._prefetch_activities')
+    @patch('app.resolve_geocode')
     @patch('app.get_nearest_airports')
-    def test_nearest_airports_success(self, mock_get_airports, mock_search_location):
+    def test_nearest_airports_success(self, mock_get_airports, mock_resolve_geocode,
+                                      mock_prefetch_activities):
         """Test successful nearest airports search."""
-        mock_search_location.return_value = [
-            {'geoCode': {'latitude': 48.8566, 'longitude': 2.3522}}
-        ]
+        mock_resolve_geocode.return_value = GeoCode(48.8566, 2.3522)
         mock_get_airports.return_value = [
             {
                 'name': 'Paris CDG',
@@ -98,6 +203,38 @@ class TestAppEndpoints(unittest.TestCase):
         self.assertIsInstance(data, list)
         self.assertEqual(len(data), 1)
 
+    @patch('app.search_activities')
+    @patch('app.resolve_geocode')
+    @patch('app.get_nearest_airports')
+    def test_nearest_airports_prefetches_activities(self, mock_get_airports, mock_resolve_geocode,
+                                                    mock_search_activities):
+        """Test that activities for the location are fetched in the background."""
+        import app as app_module
+
+        mock_resolve_geocode.return_value = GeoCode(48.8566, 2.3522)
+        mock_get_airports.return_value = [{'iataCode': 'CDG'}]
+        mock_search_activities.return_value = [{'name': 'Eiffel Tower Tour'}]
+
+        # Run the prefetch inline so it has finished when the request returns
+        with patch.object(app_module._PREFETCH_POOL, 'submit',
+                          side_effect=lambda fn, *args, **kwargs: fn(*args, **kwargs)) as mock_submit:
+            response = self.app.get('/api/nearest-airports?keyword=Paris')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), [{'iataCode': 'CDG'}])
+        mock_submit.assert_called_once()
+        mock_search_activities.assert_called_once_with(48.8566, 2.3522)
+
+    @patch('app.resolve_geocode')
+    def test_nearest_airports_location_not_found(self, mock_resolve_geocode):
+        """Test nearest airports search for an unknown location."""
+        mock_resolve_geocode.return_value = None
+
+        response = self.app.get('/api/nearest-airports?keyword=Nowhere')
+        self.assertEqual(response.status_code, 404)
+        data = response.get_json()
+        self.assertIn('error', data)
+
     def test_visa_requirements_missing_parameters(self):
         """Test visa requirements with missing parameters."""
         response = self.app.get('/api/visa-requirements')
@@ -112,6 +249,15 @@ class TestAppEndpoints(unittest.TestCase):
         data = response.get_json()
         self.assertIn('error', data)
 
+    @patch('app.get_visa_requirements')
+    def test_visa_requirements_unknown_country_code(self, mock_get_visa):
+        """Test visa requirements rejects two-letter codes that are not ISO countries."""
+        response = self.app.get('/api/visa-requirements?origin=US&destination=XX&nationality=US')
+        self.assertEqual(response.status_code, 400)
+        data = response.get_json()
+        self.assertIn('error', data)
+        mock_get_visa.assert_not_called()
+
     @patch('app.get_visa_requirements')
     def test_visa_requirements_success(self, mock_get_visa):
         """Test successful visa requirements check."""
@@ -127,6 +273,24 @@ class TestAppEndpoints(unittest.TestCase):
         data = response.get_json()
         self.assertIn('visa', data)
 
+    @patch('app.get_visa_requirements')
+    def test_visa_requirements_not_modified(self, mock_get_visa):
+        """Test that a matching If-None-Match gets an empty 304."""
+        mock_get_visa.return_value = {'visa': {'required': False}}
+        url = '/api/visa-requirements?origin=US&destination=FR&nationality=US'
+
+        first = self.app.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIsNotNone(first.headers.get('ETag'))
+        self.assertIn('max-age=900', first.headers['Cache-Control'])
+
+        second = self.app.get(url, headers={'If-None-Match': first.headers['ETag']})
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.get_data(), b'')
+
+        stale = self.app.get(url, headers={'If-None-Match': '"outdated"'})
+        self.assertEqual(stale.status_code, 200)
+
     @patch('app.get_visa_requirements')
     def test_visa_requirements_config_error(self, mock_get_visa):
         """Test visa requirements with configuration error."""
@@ -167,13 +331,11 @@ class TestAppEndpoints(unittest.TestCase):
         data = response.get_json()
         self.assertIn('error', data)
 
-    @patch('app.search_location')
+    @patch('app.resolve_geocode')
     @patch('app.search_activities')
-    def test_activity_search_success(self, mock_search_activities, mock_search_location):
+    def test_activity_search_success(self, mock_search_activities, mock_resolve_geocode):
         """Test successful activity search."""
-        mock_search_location.return_value = [
-            {'geoCode': {'latitude': 48.8566, 'longitude': 2.3522}}
-        ]
+        mock_resolve_geocode.return_value = GeoCode(48.8566, 2.3522)
         mock_search_activities.return_value = [
             {
                 'name': 'Eiffel Tower Tour',
@@ -186,6 +348,150 @@ class TestAppEndpoints(unittest.TestCase):
         data = response.get_json()
         self.assertIsInstance(data, list)
 
+    def test_destination_search_missing_keyword(self):
+        """Test destination search with missing keyword."""
+        response = self.app.get('/api/destination')
+        self.assertEqual(response.status_code, 400)
+        data = response.get_json()
+        self.assertIn('error', data)
+
+    @patch('app.search_activities')
+    @patch('app.get_nearest_airports')
+    @patch('app.resolve_geocode')
+    def test_destination_search_success(self, mock_resolve_geocode, mock_get_airports,
+                                        mock_search_activities):
+        """Test successful combined airports and activities search."""
+        mock_resolve_geocode.return_value = GeoCode(48.8566, 2.3522)
+        mock_get_airports.return_value = [{'iataCode': 'CDG'}]
+        mock_search_activities.return_value = [{'name': 'Eiffel Tower Tour'}]
+
+        response = self.app.get('/api/destination?keyword=Paris')
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data['airports'], [{'iataCode': 'CDG'}])
+        self.assertEqual(data['activities'], [{'name': 'Eiffel Tower Tour'}])
+        mock_resolve_geocode.assert_called_once_with('Paris')
+        mock_get_airports.assert_called_once_with(48.8566, 2.3522)
+        mock_search_activities.assert_called_once_with(48.8566, 2.3522)
+
+    @patch('app.search_activities')
+    @patch('app.get_nearest_airports')
+    @patch('app.resolve_geocode')
+    def test_destination_search_not_blocked_by_prefetch(self, mock_resolve_geocode, mock_get_airports,
+                                                        mock_search_activities):
+        """Test that stuck background prefetches don't delay user-facing searches."""
+        import app as app_module
+
+        release = threading.Event()
+        running = threading.Semaphore(0)
+        prefetch_coordinates = [GeoCode(10.0 + i, 20.0) for i in range(app_module._PREFETCH_WORKERS + 2)]
+        destination = GeoCode(48.8566, 2.3522)
+
+        def search_activities(latitude, longitude):
+            if (latitude, longitude) != destination:
+                running.release()
+                release.wait(5)  # Simulate a prefetch stuck on a slow upstream
+            return [{'name': 'Tour'}]
+
+        futures = []
+        submit = app_module._PREFETCH_POOL.submit
+
+        def record_submit(fn, *args, **kwargs):
+            future = submit(fn, *args, **kwargs)
+            futures.append(future)
+            return future
+
+        mock_search_activities.side_effect = search_activities
+        mock_get_airports.return_value = [{'iataCode': 'CDG'}]
+        with patch.object(app_module._PREFETCH_POOL, 'submit', side_effect=record_submit):
+            try:
+                # Fill every prefetch slot (and try to overflow them)
+                for coordinates in prefetch_coordinates:
+                    mock_resolve_geocode.return_value = coordinates
+                    self.assertEqual(self.app.get('/api/nearest-airports?keyword=Somewhere').status_code, 200)
+                for _ in range(app_module._PREFETCH_WORKERS):
+                    self.assertTrue(running.acquire(timeout=5))
+
+                mock_resolve_geocode.return_value = destination
+                response = self.app.get('/api/destination?keyword=Paris')
+
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.get_json()['activities'], [{'name': 'Tour'}])
+                # Answered while every prefetch was still blocked
+                self.assertFalse(any(future.done() for future in futures))
+            finally:
+                release.set()
+                # Let the blocked prefetches finish before the patches are undone
+                done, not_done = wait(futures, timeout=5)
+                self.assertEqual(not_done, set())
+
+        # Prefetches beyond the available slots are dropped, not queued
+        self.assertEqual(len(futures), app_module._PREFETCH_WORKERS)
+
+    @patch('app.resolve_geocode')
+    def test_destination_search_location_not_found(self, mock_resolve_geocode):
+        """Test destination search for an unknown location."""
+        mock_resolve_geocode.return_value = None
+
+        response = self.app.get('/api/destination?keyword=Nowhere')
+        self.assertEqual(response.status_code, 404)
+
+    def test_trip_search_missing_parameters(self):
+        """Test trip search with missing parameters."""
+        response = self.app.get('/api/trip?origin=JFK')
+        self.assertEqual(response.status_code, 400)
+        data = response.get_json()
+        self.assertIn('error', data)
+
+    @patch('app.search_hotels')
+    @patch('app.search_flights')
+    def test_trip_search_invalid_route(self, mock_search_flights, mock_search_hotels):
+        """Test trip search rejects malformed codes and dates like flight search does."""
+        for query in ('origin=JF1&destination=PAR&departure_date=2025-06-15',
+                      'origin=JFK&destination=PAR&departure_date=2025-02-30'):
+            response = self.app.get('/api/trip?' + query)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('error', response.get_json())
+        mock_search_flights.assert_not_called()
+        mock_search_hotels.assert_not_called()
+
+    @patch('app.search_activities')
+    @patch('app.resolve_geocode')
+    @patch('app.search_hotels')
+    @patch('app.search_flights')
+    def test_trip_search_success(self, mock_search_flights, mock_search_hotels,
+                                 mock_resolve_geocode, mock_search_activities):
+        """Test successful combined trip search."""
+        mock_search_flights.return_value = [{'price': {'total': '500.00'}}]
+        mock_search_hotels.return_value = None
+        mock_resolve_geocode.return_value = GeoCode(48.8566, 2.3522)
+        mock_search_activities.return_value = [{'name': 'Eiffel Tower Tour'}]
+
+        response = self.app.get('/api/trip?origin=JFK&destination=PAR&departure_date=2025-06-15')
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(len(data['flights']), 1)
+        self.assertEqual(data['hotels'], [])
+        self.assertEqual(len(data['activities']), 1)
+        mock_search_hotels.assert_called_once_with('PAR')
+        mock_resolve_geocode.assert_called_once_with('PAR')
+        mock_search_activities.assert_called_once_with(48.8566, 2.3522)
+
+    @patch('app.resolve_geocode')
+    @patch('app.search_hotels')
+    @patch('app.search_flights')
+    def test_trip_search_no_results(self, mock_search_flights, mock_search_hotels,
+                                    mock_resolve_geocode):
+        """Test combined trip search when every search fails."""
+        mock_search_flights.return_value = None
+        mock_search_hotels.return_value = None
+        mock_resolve_geocode.return_value = None
+
+        response = self.app.get('/api/trip?origin=JFK&destination=PAR&departure_date=2025-06-15')
+        self.assertEqual(response.status_code, 500)
+        data = response.get_json()
+        self.assertIn('error', data)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,284 @@
+"""
+Unit tests for the response caching helpers.
+
+These tests verify that results are cached per key and that failed
+lookups are not cached.
+"""
+import unittest
+from unittest.mock import MagicMock
+import os
+import sys
+import threading
+import time
+
+# Add parent directory to path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from cachetools import TTLCache
+
+from caching import PartitionedTTLCache, single_flight, ttl_cached
+
+
+class TestTTLCached(unittest.TestCase):
+    """Test cases for the ttl_cached decorator."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.upstream = MagicMock(__name__='lookup')
+        self.cached = ttl_cached(
+            TTLCache(maxsize=10, ttl=60),
+            key=lambda code: code.upper()
+        )(self.upstream)
+
+    def test_result_cached_by_key(self):
+        """Test that calls with the same normalized key hit the cache."""
+        self.upstream.return_value = ['result']
+
+        self.assertEqual(self.cached('nyc'), ['result'])
+        self.assertEqual(self.cached('NYC'), ['result'])
+        self.upstream.assert_called_once_with('nyc')
+
+    def test_falsy_result_not_cached(self):
+        """Test that None and empty results are not stored."""
+        self.upstream.side_effect = [None, [], ['result']]
+
+        self.assertIsNone(self.cached('NYC'))
+        self.assertEqual(self.cached('NYC'), [])
+        self.assertEqual(self.cached('NYC'), ['result'])
+        self.assertEqual(self.upstream.call_count, 3)
+
+    def test_cache_info(self):
+        """Test that hits, misses and size are tracked."""
+        self.upstream.return_value = ['result']
+
+        self.cached('NYC')
+        self.cached('nyc')
+
+        info = self.cached.cache_info()
+        self.assertEqual(info['hits'], 1)
+        self.assertEqual(info['misses'], 1)
+        self.assertEqual(info['size'], 1)
+        self.assertEqual(info['ttl'], 60)
+
+    def test_cache_clear(self):
+        """Test that cache_clear forces a fresh upstream call."""
+        self.upstream.return_value = ['result']
+
+        self.cached('NYC')
+        self.cached.cache_clear()
+        self.cached('NYC')
+
+        self.assertEqual(self.upstream.call_count, 2)
+
+
+class TestTTLCachedCoalesced(unittest.TestCase):
+    """Test cases for ttl_cached with coalesce=True."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.calls = []
+        self.cache = TTLCache(maxsize=10, ttl=60)
+
+        @ttl_cached(self.cache, key=lambda code: code.upper(), coalesce=True)
+        def lookup(code):
+            self.calls.append(code)
+            self.started.set()
+            self.release.wait(5)
+            if code == 'ERR':
+                raise RuntimeError('upstream failed')
+            return [code]
+
+        self.lookup = lookup
+
+    def test_result_cached_before_followers_released(self):
+        """Test that callers released by the leader find the result in the cache."""
+        results = []
+        seen_in_cache = []
+
+        def follower():
+            results.append(self.lookup('nyc'))
+            seen_in_cache.append('NYC' in self.cache)
+            results.append(self.lookup('nyc'))
+
+        leader = threading.Thread(target=lambda: results.append(self.lookup('nyc')))
+        leader.start()
+        self.started.wait(5)
+        followers = [threading.Thread(target=follower) for _ in range(4)]
+        for thread in followers:
+            thread.start()
+        time.sleep(0.1)
+        self.release.set()
+        for thread in [leader] + followers:
+            thread.join(5)
+
+        self.assertEqual(self.calls, ['nyc'])
+        self.assertEqual(seen_in_cache, [True] * 4)
+        self.assertEqual(results, [['nyc']] * 9)
+
+    def test_exception_shared_and_not_cached(self):
+        """Test that a failed call is raised to followers and retried afterwards."""
+        errors = []
+
+        def call():
+            try:
+                self.lookup('ERR')
+            except RuntimeError as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=call)]
+        threads[0].start()
+        self.started.wait(5)
+        threads += [threading.Thread(target=call) for _ in range(2)]
+        for thread in threads[1:]:
+            thread.start()
+        time.sleep(0.1)
+        self.release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(len(errors), 3)
+        with self.assertRaises(RuntimeError):
+            self.lookup('ERR')
+        self.assertEqual(len(self.calls), 2)
+
+
+class TestPartitionedTTLCache(unittest.TestCase):
+    """Test cases for the route-partitioned TTL cache."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.now = 0
+        self.cache = PartitionedTTLCache(
+            maxsize=2, ttl=600, partition_size=2, timer=lambda: self.now
+        )
+
+    def test_get_exact_secondary_match(self):
+        """Test that only the exact (date, adults) entry is returned."""
+        self.cache[('JFK', 'LHR', '2025-06-15', 1)] = ['offer']
+
+        self.assertEqual(self.cache.get(('JFK', 'LHR', '2025-06-15', 1)), ['offer'])
+        self.assertIsNone(self.cache.get(('JFK', 'LHR', '2025-06-15', 2)))
+        self.assertIsNone(self.cache.get(('LHR', 'JFK', '2025-06-15', 1)))
+
+    def test_entries_expire(self):
+        """Test that entries older than the TTL are not returned."""
+        self.cache[('JFK', 'LHR', '2025-06-15', 1)] = ['offer']
+        self.now = 600
+
+        self.assertIsNone(self.cache.get(('JFK', 'LHR', '2025-06-15', 1)))
+
+    def test_expired_entries_removed(self):
+        """Test that expired entries and empty routes are dropped from the cache."""
+        self.cache[('JFK', 'LHR', '2025-06-15', 1)] = ['a']
+        self.now = 300
+        self.cache[('JFK', 'LHR', '2025-06-16', 1)] = ['b']
+        self.cache[('JFK', 'CDG', '2025-06-15', 1)] = ['c']
+        self.assertEqual(len(self.cache), 3)
+
+        self.now = 600
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(self.cache.get(('JFK', 'LHR', '2025-06-16', 1)), ['b'])
+
+        self.now = 900
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache._partitions, {})
+
+    def test_partition_size_bounded(self):
+        """Test that each route keeps only the most recent entries."""
+        for day in ('15', '16', '17'):
+            self.cache[('JFK', 'LHR', '2025-06-' + day, 1)] = [day]
+
+        self.assertEqual(len(self.cache), 2)
+        self.assertIsNone(self.cache.get(('JFK', 'LHR', '2025-06-15', 1)))
+        self.assertEqual(self.cache.get(('JFK', 'LHR', '2025-06-17', 1)), ['17'])
+
+    def test_overwrite_replaces_entry(self):
+        """Test that storing the same key again replaces the old entry."""
+        self.cache[('JFK', 'LHR', '2025-06-15', 1)] = ['old']
+        self.cache[('JFK', 'LHR', '2025-06-15', 1)] = ['new']
+
+        self.assertEqual(len(self.cache), 1)
+        self.assertEqual(self.cache.get(('JFK', 'LHR', '2025-06-15', 1)), ['new'])
+
+    def test_least_recent_route_evicted(self):
+        """Test that the least recently used route is evicted first."""
+        self.cache[('JFK', 'LHR', '2025-06-15', 1)] = ['a']
+        self.cache[('JFK', 'CDG', '2025-06-15', 1)] = ['b']
+        self.cache.get(('JFK', 'LHR', '2025-06-15', 1))
+        self.cache[('JFK', 'FRA', '2025-06-15', 1)] = ['c']
+
+        self.assertEqual(self.cache.get(('JFK', 'LHR', '2025-06-15', 1)), ['a'])
+        self.assertIsNone(self.cache.get(('JFK', 'CDG', '2025-06-15', 1)))
+
+
+class TestSingleFlight(unittest.TestCase):
+    """Test cases for the single_flight decorator."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.calls = []
+
+        @single_flight(key=lambda code: code.upper())
+        def lookup(code):
+            self.calls.append(code)
+            self.started.set()
+            self.release.wait(5)
+            if code == 'ERR':
+                raise RuntimeError('upstream failed')
+            return [code]
+
+        self.lookup = lookup
+
+    def _run_concurrently(self, code, count=5):
+        results = []
+
+        def call():
+            try:
+                results.append(self.lookup(code))
+            except RuntimeError as error:
+                results.append(error)
+
+        threads = [threading.Thread(target=call)]
+        threads[0].start()
+        self.started.wait(5)
+        threads += [threading.Thread(target=call) for _ in range(count - 1)]
+        for thread in threads[1:]:
+            thread.start()
+        time.sleep(0.1)
+        self.release.set()
+        for thread in threads:
+            thread.join(5)
+        return results
+
+    def test_concurrent_calls_coalesced(self):
+        """Test that concurrent calls for one key share a single upstream call."""
+        results = self._run_concurrently('nyc')
+
+        self.assertEqual(self.calls, ['nyc'])
+        self.assertEqual(results, [['nyc']] * 5)
+
+    def test_exception_shared(self):
+        """Test that an upstream exception is raised to every waiting caller."""
+        results = self._run_concurrently('ERR')
+
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+
+    def test_sequential_calls_not_coalesced(self):
+        """Test that calls made after completion hit upstream again."""
+        self.release.set()
+
+        self.lookup('nyc')
+        self.lookup('nyc')
+
+        self.assertEqual(len(self.calls), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
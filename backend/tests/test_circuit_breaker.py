@@ -0,0 +1,129 @@
+"""
+Unit tests for the circuit breaker.
+
+These tests verify the closed -> open -> half-open state transitions.
+"""
+import unittest
+from unittest.mock import MagicMock
+import os
+import sys
+
+# Add parent directory to path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Test cases for the CircuitBreaker class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.now = 0
+        self.breaker = CircuitBreaker(
+            'Test API',
+            fail_max=2,
+            reset_timeout=30,
+            is_failure=lambda error: not isinstance(error, ValueError),
+            timer=lambda: self.now
+        )
+        self.upstream = MagicMock()
+
+    def _fail(self, error=None):
+        self.upstream.side_effect = error or RuntimeError('down')
+        with self.assertRaises(type(self.upstream.side_effect)):
+            self.breaker.call(self.upstream)
+
+    def test_opens_after_consecutive_failures(self):
+        """Test that the breaker opens and rejects calls after fail_max failures."""
+        self._fail()
+        self.assertEqual(self.breaker.state, 'closed')
+        self._fail()
+        self.assertEqual(self.breaker.state, 'open')
+
+        self.upstream.reset_mock()
+        with self.assertRaises(CircuitOpenError) as context:
+            self.breaker.call(self.upstream)
+        self.assertEqual(context.exception.retry_after, 30)
+        self.upstream.assert_not_called()
+
+    def test_success_resets_failure_count(self):
+        """Test that a success between failures keeps the breaker closed."""
+        self._fail()
+        self.upstream.side_effect = None
+        self.breaker.call(self.upstream)
+        self._fail()
+
+        self.assertEqual(self.breaker.state, 'closed')
+
+    def test_non_failure_errors_ignored(self):
+        """Test that errors rejected by is_failure do not open the breaker."""
+        self._fail(ValueError('bad request'))
+        self._fail(ValueError('bad request'))
+
+        self.assertEqual(self.breaker.state, 'closed')
+
+    def test_non_failure_errors_keep_failure_count(self):
+        """Test that client errors between failures don't reset the count."""
+        self._fail()
+        self._fail(ValueError('bad request'))
+        self._fail()
+
+        self.assertEqual(self.breaker.state, 'open')
+
+    def test_non_failure_error_during_probe_keeps_breaker_open(self):
+        """Test that a client error during a probe neither closes nor blocks the breaker."""
+        self._fail()
+        self._fail()
+        self.now = 30
+        self._fail(ValueError('bad request'))
+
+        self.assertNotEqual(self.breaker.state, 'closed')
+        self.upstream.side_effect = None
+        self.upstream.return_value = 'ok'
+        self.assertEqual(self.breaker.call(self.upstream), 'ok')
+        self.assertEqual(self.breaker.state, 'closed')
+
+    def test_half_open_probe_success_closes(self):
+        """Test that a successful probe after the timeout closes the breaker."""
+        self._fail()
+        self._fail()
+        self.now = 30
+        self.assertEqual(self.breaker.state, 'half-open')
+
+        self.upstream.side_effect = None
+        self.upstream.return_value = 'ok'
+        self.assertEqual(self.breaker.call(self.upstream), 'ok')
+        self.assertEqual(self.breaker.state, 'closed')
+
+    def test_half_open_probe_failure_reopens(self):
+        """Test that a failed probe re-opens the breaker for another timeout."""
+        self._fail()
+        self._fail()
+        self.now = 30
+        self._fail()
+
+        self.assertEqual(self.breaker.state, 'open')
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.call(self.upstream)
+
+
+    def test_interrupted_probe_allows_next_probe(self):
+        """Test that a BaseException during a probe doesn't leave the breaker stuck."""
+        class Interrupted(BaseException):
+            pass
+
+        self._fail()
+        self._fail()
+        self.now = 30
+        self.upstream.side_effect = Interrupted()
+        with self.assertRaises(Interrupted):
+            self.breaker.call(self.upstream)
+
+        self.upstream.side_effect = None
+        self.upstream.return_value = 'ok'
+        self.assertEqual(self.breaker.call(self.upstream), 'ok')
+        self.assertEqual(self.breaker.state, 'closed')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,11 +8,14 @@ import unittest
 from unittest.mock import patch, MagicMock
 import os
 import sys
+import threading
+import time
 import requests
 
 # Add parent directory to path to import modules
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+import sherpa_api
 from sherpa_api import get_visa_requirements
 
 
@@ -26,28 +29,27 @@ class TestSherpaAPI(unittest.TestCase):
             'SHERPA_API_KEY': 'test_api_key'
         })
         self.env_patcher.start()
+        sherpa_api._reload_auth()
+        get_visa_requirements.cache_clear()
 
     def tearDown(self):
         """Clean up after tests."""
         self.env_patcher.stop()
+        sherpa_api._reload_auth()
 
     def test_get_visa_requirements_missing_api_key(self):
         """Test that ValueError is raised when API key is missing."""
         with patch.dict(os.environ, {}, clear=True):
+            sherpa_api._reload_auth()
             with self.assertRaises(ValueError):
                 get_visa_requirements('US', 'FR', 'US')
 
-    @patch('sherpa_api.requests.post')
+    @patch('sherpa_api._SESSION.post')
     def test_get_visa_requirements_success(self, mock_post):
         """Test successful visa requirements retrieval."""
         # Mock successful API response
         mock_response = MagicMock()
-        mock_response.json.return_value = {
-            'visa': {
-                'required': False,
-                'type': 'Visa Not Required'
-            }
-        }
+        mock_response.content = b'{"visa": {"required": false, "type": "Visa Not Required"}}'
         mock_response.raise_for_status = MagicMock()
         mock_post.return_value = mock_response
 
@@ -59,11 +61,14 @@ class TestSherpaAPI(unittest.TestCase):
         
         # Verify API call parameters
         call_args = mock_post.call_args
-        self.assertIn('headers', call_args.kwargs)
         self.assertIn('json', call_args.kwargs)
-        self.assertEqual(call_args.kwargs['headers']['Authorization'], 'Bearer test_api_key')
+        self.assertEqual(sherpa_api._SESSION.headers['Authorization'], 'Bearer test_api_key')
 
-    @patch('sherpa_api.requests.post')
+    def test_session_sends_json_content_type(self):
+        """Test that the shared session sends JSON requests."""
+        self.assertEqual(sherpa_api._SESSION.headers['Content-Type'], 'application/json')
+
+    @patch('sherpa_api._SESSION.post')
     def test_get_visa_requirements_http_error(self, mock_post):
         """Test visa requirements with HTTP error."""
         # Mock HTTP error response
@@ -76,7 +81,7 @@ class TestSherpaAPI(unittest.TestCase):
         
         self.assertIsNone(result)
 
-    @patch('sherpa_api.requests.post')
+    @patch('sherpa_api._SESSION.post')
     def test_get_visa_requirements_timeout(self, mock_post):
         """Test visa requirements with timeout error."""
         mock_post.side_effect = requests.exceptions.Timeout()
@@ -85,11 +90,23 @@ class TestSherpaAPI(unittest.TestCase):
         
         self.assertIsNone(result)
 
-    @patch('sherpa_api.requests.post')
+    @patch('sherpa_api._SESSION.post')
+    def test_get_visa_requirements_invalid_json(self, mock_post):
+        """Test visa requirements with a malformed response body."""
+        mock_response = MagicMock()
+        mock_response.content = b'<html>Bad Gateway</html>'
+        mock_response.raise_for_status = MagicMock()
+        mock_post.return_value = mock_response
+
+        result = get_visa_requirements('US', 'FR', 'US')
+
+        self.assertIsNone(result)
+
+    @patch('sherpa_api._SESSION.post')
     def test_get_visa_requirements_country_codes_uppercase(self, mock_post):
         """Test that country codes are converted to uppercase."""
         mock_response = MagicMock()
-        mock_response.json.return_value = {'visa': {'required': False}}
+        mock_response.content = b'{"visa": {"required": false}}'
         mock_response.raise_for_status = MagicMock()
         mock_post.return_value = mock_response
 
@@ -102,6 +119,55 @@ class TestSherpaAPI(unittest.TestCase):
         self.assertEqual(payload['trip']['destination']['countryCode'], 'FR')
         self.assertEqual(payload['trip']['nationality']['countryCode'], 'US')
 
+    def test_reload_auth_removes_missing_key(self):
+        """Test that reloading without a key drops the Authorization header."""
+        with patch.dict(os.environ, {}, clear=True):
+            sherpa_api._reload_auth()
+            self.assertNotIn('Authorization', sherpa_api._SESSION.headers)
+
+    @patch('sherpa_api._SESSION.post')
+    def test_get_visa_requirements_cached(self, mock_post):
+        """Test that repeated visa checks for the same trip are cached."""
+        mock_response = MagicMock()
+        mock_response.content = b'{"visa": {"required": false}}'
+        mock_response.raise_for_status = MagicMock()
+        mock_post.return_value = mock_response
+
+        first = get_visa_requirements('US', 'FR', 'US')
+        second = get_visa_requirements('us', 'fr', 'us')
+
+        self.assertEqual(first, second)
+        mock_post.assert_called_once()
+
+    @patch('sherpa_api._SESSION.post')
+    def test_get_visa_requirements_concurrent_calls_coalesced(self, mock_post):
+        """Test that concurrent checks for the same trip share one request."""
+        release = threading.Event()
+        mock_response = MagicMock()
+        mock_response.content = b'{"visa": {"required": false}}'
+        mock_response.raise_for_status = MagicMock()
+
+        def slow_post(*args, **kwargs):
+            release.wait(5)
+            return mock_response
+
+        mock_post.side_effect = slow_post
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(get_visa_requirements('US', 'FR', 'US')))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        mock_post.assert_called_once()
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(result == {'visa': {'required': False}} for result in results))
+
 
 if __name__ == '__main__':
     unittest.main()